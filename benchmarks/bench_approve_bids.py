@@ -0,0 +1,94 @@
+"""
+Benchmark City.approve_bids: previous pandas DataFrame path vs market.match_bids.
+
+Run from the repository root:
+    python benchmarks/bench_approve_bids.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.market import match_bids
+
+
+def approve_bids_dataframe(bids):
+    """Previous implementation of City.approve_bids (DataFrame + iterrows)"""
+    if not bids:
+        return []
+
+    df_bids = pd.DataFrame(bids)
+    df_bids = df_bids.sort_values('spread', ascending=False)
+
+    approved_transactions = []
+    buyers_used = set()
+    places_sold = set()
+
+    for _, bid in df_bids.iterrows():
+        buyer_id = bid['buyer_id']
+        place_id = bid['place_id']
+        if buyer_id not in buyers_used and place_id not in places_sold:
+            approved_transactions.append(bid.to_dict())
+            buyers_used.add(buyer_id)
+            places_sold.add(place_id)
+
+    return approved_transactions
+
+
+def approve_bids_native(bids):
+    """Current implementation of City.approve_bids"""
+    if not bids:
+        return []
+
+    spread = np.fromiter((bid['spread'] for bid in bids), dtype=np.float64, count=len(bids))
+    buyer_ids = [bid['buyer_id'] for bid in bids]
+    place_ids = [bid['place_id'] for bid in bids]
+    approved = match_bids(buyer_ids, place_ids, spread)
+
+    return [bids[i] for i in approved.tolist()]
+
+
+def generate_bids(num_bids, seed=0):
+    """Random bids shaped like the ones Host.make_bids produces"""
+    rng = np.random.default_rng(seed)
+    num_hosts = max(10, num_bids // 8)
+    buyers = rng.integers(0, num_hosts, num_bids)
+    places = rng.integers(0, num_hosts, num_bids)
+    # Round the spreads so that ties actually occur
+    spreads = np.round(rng.exponential(50000, num_bids), -2)
+
+    return [
+        {'place_id': p, 'seller_id': p, 'buyer_id': b, 'spread': s, 'bid_price': s + 100000.0}
+        for p, b, s in zip(places.tolist(), buyers.tolist(), spreads.tolist())
+    ]
+
+
+def time_call(func, bids):
+    start = time.perf_counter()
+    result = func(bids)
+    return time.perf_counter() - start, result
+
+
+def main():
+    print(f"{'bids':>10} {'dataframe (s)':>15} {'native (s)':>12} {'speedup':>9}")
+
+    for num_bids in [1_000, 100_000, 1_000_000]:
+        bids = generate_bids(num_bids)
+
+        df_time, df_result = time_call(approve_bids_dataframe, bids)
+        native_time, native_result = time_call(approve_bids_native, bids)
+
+        # Both paths must approve the same bids in the same order
+        df_keys = [(int(t['buyer_id']), int(t['place_id'])) for t in df_result]
+        native_keys = [(t['buyer_id'], t['place_id']) for t in native_result]
+        assert df_keys == native_keys, f"results differ at {num_bids} bids"
+
+        print(f"{num_bids:>10,} {df_time:>15.3f} {native_time:>12.3f} {df_time / native_time:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Scaling benchmark for City across grid sizes, horizons, engines and bidding rules.
+
+Every scenario runs in a fresh process so its peak RSS is its own. Per scenario
+it records construction time, traced memory of the constructed city, total
+run time, the per-phase breakdown of iterate() from StepProfiler (bids =
+make_bids/make_bids_v02, approve = approve_bids, execute = execute_transactions)
+and the process peak RSS.
+
+Run from the repository root:
+    python benchmarks/bench_city.py --save benchmarks/baselines/my_machine.json
+    python benchmarks/bench_city.py --compare benchmarks/baselines/my_machine.json
+
+Each scenario is repeated --repeat times (default 3) and the fastest time of
+every phase is kept. --compare exits with status 1 if any timing is slower than
+the baseline by more than --threshold (default 25%) and by at least --min-seconds
+(default 10 ms); smaller differences are timer and scheduling noise.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.city import City
+from src.profiling import StepProfiler
+
+
+AREA_RATES = {
+    0: (100, 200),
+    1: (50, 250),
+    2: (250, 350),
+    3: (150, 450)
+}
+
+# The object engine is skipped above this many place-steps unless --all is given
+OBJECT_ENGINE_LIMIT = 2e7
+
+
+def scenario_name(scenario):
+    return f"{scenario['engine']}-{scenario['rule']}-size{scenario['size']}-steps{scenario['steps']}"
+
+
+def run_scenario(scenario):
+    """Worker: construct and run one City, return its measurements"""
+    size = scenario['size']
+
+    start = time.perf_counter()
+    city = City(size, AREA_RATES, engine=scenario['engine'], rng=scenario['seed'])
+    construction_seconds = time.perf_counter() - start
+    city.close()
+    del city
+
+    # Second construction under tracemalloc for the size of the object graph
+    tracemalloc.start()
+    city = City(size, AREA_RATES, engine=scenario['engine'], rng=scenario['seed'])
+    _, construction_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    city.same_area_rule = scenario['rule'] == 'v02'
+    city.profiler = StepProfiler()
+    city.profiler.start()
+    for _ in range(scenario['steps']):
+        city.iterate()
+    city.profiler.stop()
+    report = city.profiler.report()
+    city.close()
+
+    timings = {
+        'construction': construction_seconds,
+        'run': report['wall_seconds'],
+    }
+    for phase, stats in report['phases'].items():
+        timings[phase] = stats['seconds']
+
+    return {
+        'scenario': scenario,
+        'timings': timings,
+        'counters': report['counters'],
+        'construction_traced_mb': construction_peak / 1e6,
+        # ru_maxrss is in kilobytes on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3,
+    }
+
+
+def build_scenarios(sizes, steps, engines, rules, seed, run_all):
+    scenarios = []
+    for size, num_steps, engine, rule in itertools.product(sizes, steps, engines, rules):
+        if engine == 'object' and size * size * num_steps > OBJECT_ENGINE_LIMIT and not run_all:
+            print(f"skipping {engine}-{rule}-size{size}-steps{num_steps} (use --all)")
+            continue
+        scenarios.append({'size': size, 'steps': num_steps, 'engine': engine, 'rule': rule, 'seed': seed})
+    return scenarios
+
+
+def best_of(runs):
+    """Combine repeated runs of one scenario: fastest time per phase, largest peak RSS"""
+    result = dict(runs[0])
+    result['timings'] = {key: min(run['timings'][key] for run in runs) for key in runs[0]['timings']}
+    result['peak_rss_mb'] = max(run['peak_rss_mb'] for run in runs)
+    result['repeats'] = len(runs)
+    return result
+
+
+def compare(results, baseline, threshold, min_seconds=0.01):
+    """Timings slower than baseline * (1 + threshold) and by min_seconds or more, as printable strings"""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for key, seconds in result['timings'].items():
+            base = baseline[name]['timings'].get(key)
+            if base and seconds > base * (1 + threshold) and seconds - base >= min_seconds:
+                regressions.append(f"{name} {key}: {base:.4f}s -> {seconds:.4f}s ({seconds / base - 1:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="City scaling benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 50, 100, 300])
+    parser.add_argument('--steps', type=int, nargs='+', default=[180, 1000])
+    parser.add_argument('--engines', nargs='+', default=['object', 'array'], choices=['object', 'array', 'tiled'])
+    parser.add_argument('--rules', nargs='+', default=['v0', 'v02'], choices=['v0', 'v02'])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--all', action='store_true', help="do not skip slow object-engine scenarios")
+    parser.add_argument('--save', metavar='PATH', help="write results as a JSON baseline")
+    parser.add_argument('--compare', metavar='PATH', help="baseline JSON to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per scenario, the fastest is kept")
+    parser.add_argument('--min-seconds', type=float, default=0.01,
+                        help="smallest absolute slowdown reported as a regression")
+    args = parser.parse_args()
+
+    scenarios = build_scenarios(args.sizes, args.steps, args.engines, args.rules, args.seed, args.all)
+
+    print(f"{'scenario':<34} {'build (s)':>10} {'run (s)':>9} {'bids (s)':>9} "
+          f"{'approve (s)':>11} {'execute (s)':>11} {'city (MB)':>10} {'rss (MB)':>9}")
+
+    results = {}
+    context = multiprocessing.get_context('spawn')
+    for scenario in scenarios:
+        # A fresh process per run keeps peak RSS measurements independent
+        runs = []
+        for _ in range(args.repeat):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                runs.append(pool.submit(run_scenario, scenario).result())
+        result = best_of(runs)
+        name = scenario_name(scenario)
+        results[name] = result
+
+        timings = result['timings']
+        print(f"{name:<34} {timings['construction']:>10.3f} {timings['run']:>9.3f} "
+              f"{timings.get('bids', 0):>9.3f} {timings.get('approve', 0):>11.3f} "
+              f"{timings.get('execute', 0):>11.3f} {result['construction_traced_mb']:>10.1f} "
+              f"{result['peak_rss_mb']:>9.1f}")
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump({'machine': platform.platform(), 'python': platform.python_version(),
+                       'results': results}, f, indent=2)
+        print(f"Baseline saved: {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold, args.min_seconds)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
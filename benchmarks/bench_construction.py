@@ -0,0 +1,53 @@
+"""
+Benchmark City construction: per-place initializer (City(...)) vs the bulk
+constructor (City.build(...)), including the cost of materializing the
+Place/Host objects of a bulk-built array city on first access.
+
+Run from the repository root:
+    python benchmarks/bench_construction.py --sizes 100 300 1000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.city import City
+
+
+AREA_RATES = {
+    0: (100, 200),
+    1: (50, 250),
+    2: (250, 350),
+    3: (150, 450)
+}
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="City construction benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50, 100, 300])
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'size':>6} {'places':>10} {'City() (s)':>11} {'build obj (s)':>14} "
+          f"{'build array (s)':>16} {'materialize (s)':>16} {'speedup':>8}")
+
+    for size in args.sizes:
+        initializer, _ = timed(lambda: City(size, AREA_RATES, rng=args.seed))
+        bulk_object, _ = timed(lambda: City.build(size, AREA_RATES, engine='object', rng=args.seed))
+        bulk_array, city = timed(lambda: City.build(size, AREA_RATES, engine='array', rng=args.seed))
+        materialize, _ = timed(lambda: city.places)
+
+        print(f"{size:>6} {size * size:>10,} {initializer:>11.3f} {bulk_object:>14.3f} "
+              f"{bulk_array:>16.3f} {materialize:>16.3f} {initializer / bulk_array:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,171 +1,131 @@
-import random
-import matplotlib.pyplot as plt
-import numpy as np
+import argparse
+import json
 import os
 from src.city import City
-
-
-def set_random_seed(seed=42):
-    """Set random seed for reproducibility"""
-    random.seed(seed)
-    np.random.seed(seed)
+from src.hosts import Host
+from src.eventlog import TransactionLog
+from src.profiling import StepProfiler
+from src.reports import FORMATS, area_statistics, output_paths, render_reports, wealth_summary
 
 
 def calculate_host_wealth(host, city):
-    """Calculate total wealth = profits + most recent property prices"""
-    wealth = host.profits
-    
-    # Add the most recent sale price of all owned properties
-    for place_id in host.assets:
-        place = city.get_place(place_id)
-        if place and place.price:
-            # Get the most recent price
-            most_recent_price = max(place.price.values())
-            wealth += most_recent_price
-    
-    return wealth
+    """Calculate total wealth = profits + most recent property prices
+    host can be a Host or a host_id (looked up through city.get_host).
+    The portfolio value is maintained on every transaction; for all hosts at
+    once use src.analytics.city_wealth."""
+    if not isinstance(host, Host):
+        host = city.get_host(host)
+    
+    return host.wealth
 
 
-def run_simulation(area_rates, bidding_version='v0', num_steps=180, seed=42):
+def run_simulation(area_rates, bidding_version='v0', num_steps=180, seed=42,
+                   size=10, engine='object', recorder=None, profiler=None, bidding_policy=None,
+                   scheduler=None, event_log=None):
     """
     Run the simulation with specified bidding mechanism.
+    engine='array' advances each step with the vectorized NumPy engine.
+    recorder (e.g. src.recorder.MetricsRecorder) is called after every step.
+    profiler (src.profiling.StepProfiler) times every phase of every step.
+    bidding_policy (src.bidding.BiddingPolicy) replaces the rule chosen by bidding_version.
+    scheduler (src.scheduler.ActiveSet) only asks hosts for bids once they may afford one.
+    event_log is a directory for a src.eventlog.TransactionLog of the run (read with EventLog).
     """
-    set_random_seed(seed)
-    
-    city = City(size=10, area_rates=area_rates)
+    city = City(size=size, area_rates=area_rates, engine=engine, rng=seed)
     city.same_area_rule = (bidding_version == 'v02')
+    city.bidding_policy = bidding_policy
+    city.scheduler = scheduler
+    if event_log is not None:
+        city.event_log = TransactionLog(event_log, city)
+    city.recorder = recorder
+    city.profiler = profiler
+    
+    if profiler is not None:
+        profiler.start()
     
     for step in range(num_steps):
         city.iterate()
     
+    if profiler is not None:
+        profiler.stop()
+    
+    if recorder is not None:
+        recorder.flush()
+    
+    if city.event_log is not None:
+        city.event_log.close()
+    
     return city
 
 
-def create_wealth_chart(city, filename):
+def print_area_statistics(city, summary):
+    """Print mean/median wealth and host count per area"""
+    print(f"\nWealth statistics by area:")
+    for area, stats in area_statistics(summary).items():
+        rate_range = city.area_rates[area]
+        print(f"  Area {area} (rate range {rate_range}): "
+              f"avg=${stats['mean']:.0f}, "
+              f"median=${stats['median']:.0f}, "
+              f"hosts={stats['count']}")
+
+
+def create_wealth_chart(city, filename, formats=('png',), dpi=300):
     """
     Create vertical bar chart sorted by wealth.
     Each bar = one host, height = wealth, color = area of origin
+    Returns the summary arrays (see src.reports.wealth_summary) behind the chart.
     """
-    # Calculate wealth for each host
-    host_data = []
-    
-    for host in city.hosts:
-        wealth = calculate_host_wealth(host, city)
-        host_data.append({
-            'host_id': host.host_id,
-            'wealth': wealth,
-            'area': host.area
-        })
-    
-    # Sort by wealth (smallest to largest)
-    host_data.sort(key=lambda x: x['wealth'])
-    
-    # Prepare data for plotting
-    wealths = [data['wealth'] for data in host_data]
-    areas = [data['area'] for data in host_data]
-    
-    # Create color map for areas
-    area_colors = {0: '#E74C3C', 1: '#3498DB', 2: '#2ECC71', 3: '#F39C12'}
-    colors = [area_colors[area] for area in areas]
-    
-    # Create the plot
-    plt.figure(figsize=(14, 6))
-    plt.bar(range(len(wealths)), wealths, color=colors, edgecolor='black', linewidth=0.5)
-    
-    plt.xlabel('Host (sorted by wealth)', fontsize=12)
-    plt.ylabel('Total Wealth ($)', fontsize=12)
-    plt.title('Host Wealth Distribution by Area of Origin', fontsize=14, fontweight='bold')
-    
-    # Create legend
-    legend_elements = [plt.Rectangle((0,0),1,1, facecolor=area_colors[i], 
-                                   edgecolor='black', label=f'Area {i}') for i in range(4)]
-    plt.legend(handles=legend_elements, loc='upper left', fontsize=11)
-    
-    plt.grid(True, alpha=0.3, axis='y')
-    plt.tight_layout()
-    
-    # Ensure reports directory exists
-    os.makedirs('reports', exist_ok=True)
-    
-    # Save the chart
-    plt.savefig(filename, dpi=300, bbox_inches='tight')
-    plt.close()
-    
+    summary = wealth_summary(city)
+    render_reports([{'kind': 'wealth', 'summary': summary, 'filename': filename}], formats=formats, dpi=dpi)
     print(f"Chart saved: {filename}")
     
-    return host_data
+    return summary
 
 
-def create_comparison_analysis(city, host_data, filename):
+def create_comparison_analysis(city, summary, filename, formats=('png',), dpi=300):
     """
     Create box plot comparing wealth distribution by area
+    summary is the return value of create_wealth_chart (None computes it).
     """
-    # Group wealth by area
-    area_wealth = {0: [], 1: [], 2: [], 3: []}
-    
-    for data in host_data:
-        area_wealth[data['area']].append(data['wealth'])
-    
-    # Calculate statistics by area
-    area_stats = {}
-    for area in range(4):
-        if area_wealth[area]:
-            area_stats[area] = {
-                'mean': np.mean(area_wealth[area]),
-                'median': np.median(area_wealth[area]),
-                'std': np.std(area_wealth[area]),
-                'count': len(area_wealth[area])
-            }
-    
-    # Create comparison chart
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
-    
-    # Chart 1: Average wealth by area
-    areas = list(area_stats.keys())
-    means = [area_stats[area]['mean'] for area in areas]
-    area_colors_list = ['#E74C3C', '#3498DB', '#2ECC71', '#F39C12']
-    
-    ax1.bar(areas, means, color=area_colors_list, edgecolor='black', linewidth=1.5)
-    ax1.set_xlabel('Area', fontsize=12)
-    ax1.set_ylabel('Average Wealth ($)', fontsize=12)
-    ax1.set_title('Average Wealth by Area', fontsize=13, fontweight='bold')
-    ax1.set_xticks(areas)
-    ax1.grid(True, alpha=0.3, axis='y')
-    
-    # Chart 2: Wealth distribution (box plot)
-    wealth_by_area = [area_wealth[area] for area in areas]
-    bp = ax2.boxplot(wealth_by_area, labels=[f'Area {a}' for a in areas], 
-                     patch_artist=True, widths=0.6)
-    
-    for patch, color in zip(bp['boxes'], area_colors_list):
-        patch.set_facecolor(color)
-        patch.set_alpha(0.7)
-        patch.set_edgecolor('black')
-    
-    ax2.set_xlabel('Area', fontsize=12)
-    ax2.set_ylabel('Wealth Distribution ($)', fontsize=12)
-    ax2.set_title('Wealth Distribution by Area', fontsize=13, fontweight='bold')
-    ax2.grid(True, alpha=0.3, axis='y')
-    
-    plt.tight_layout()
-    plt.savefig(filename, dpi=300, bbox_inches='tight')
-    plt.close()
-    
+    if summary is None:
+        summary = wealth_summary(city)
+    render_reports([{'kind': 'area_comparison', 'summary': summary, 'filename': filename}],
+                   formats=formats, dpi=dpi)
     print(f"Analysis saved: {filename}")
     
-    # Print statistics
-    print(f"\nWealth statistics by area:")
-    for area in range(4):
-        if area in area_stats:
-            stats = area_stats[area]
-            rate_range = city.area_rates[area]
-            print(f"  Area {area} (rate range {rate_range}): "
-                  f"avg=${stats['mean']:.0f}, "
-                  f"median=${stats['median']:.0f}, "
-                  f"hosts={stats['count']}")
+    print_area_statistics(city, summary)
+
+
+def parse_args(argv=None):
+    """Command line options of main.py"""
+    parser = argparse.ArgumentParser(description="Airbnb market simulation (v0 vs v02)")
+    parser.add_argument('--profile', action='store_true',
+                        help="time every phase of every step and print a breakdown table")
+    parser.add_argument('--profile-json', metavar='PATH',
+                        help="also write the breakdown as JSON (one entry per bidding version)")
+    parser.add_argument('--cprofile', action='store_true',
+                        help="capture a cProfile of each run (implies --profile)")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="record peak traced memory of each run (implies --profile)")
+    parser.add_argument('--formats', nargs='+', default=['png'], choices=FORMATS,
+                        help="report formats; svg/pdf are vector, csv writes the data behind each chart")
+    parser.add_argument('--dpi', type=int, default=300, help="resolution of png reports")
+    parser.add_argument('--force-render', action='store_true',
+                        help="redraw reports even if their inputs did not change")
+    return parser.parse_args(argv)
+
 
+def make_profiler(args):
+    """StepProfiler configured from the command line, or None if profiling is off"""
+    if not (args.profile or args.profile_json or args.cprofile or args.trace_memory):
+        return None
+    return StepProfiler(cprofile=args.cprofile, trace_memory=args.trace_memory)
 
-def main():
+
+def main(argv=None):
+    
+    args = parse_args(argv)
+    profiles = {}
     
     print("=" * 60)
     print("Starting Airbnb Market Simulation")
@@ -189,32 +149,57 @@ def main():
     print("\n" + "-" * 60)
     print("Running Simulation v0 (No area restriction)...")
     print("-" * 60)
-    city_v0 = run_simulation(area_rates, bidding_version='v0', num_steps=180, seed=42)
-    host_data_v0 = create_wealth_chart(city_v0, 'reports/graph1.png')
-    create_comparison_analysis(city_v0, host_data_v0, 'reports/graph2_v0.png')
+    profiler = make_profiler(args)
+    city_v0 = run_simulation(area_rates, bidding_version='v0', num_steps=180, seed=42,
+                             profiler=profiler)
+    if profiler is not None:
+        profiles['v0'] = profiler.report()
+        print(profiler.table())
+    summary_v0 = wealth_summary(city_v0)
+    print_area_statistics(city_v0, summary_v0)
     
     # Run v02 (make_bids_v02 with area restriction)
     print("\n" + "-" * 60)
     print("Running Simulation v02 (With area restriction)...")
     print("-" * 60)
-    city_v02 = run_simulation(area_rates, bidding_version='v02', num_steps=180, seed=42)
-    host_data_v02 = create_wealth_chart(city_v02, 'reports/graph1_v02.png')
-    create_comparison_analysis(city_v02, host_data_v02, 'reports/graph2_v02.png')
+    profiler = make_profiler(args)
+    city_v02 = run_simulation(area_rates, bidding_version='v02', num_steps=180, seed=42,
+                             profiler=profiler)
+    if profiler is not None:
+        profiles['v02'] = profiler.report()
+        print(profiler.table())
+    summary_v02 = wealth_summary(city_v02)
+    print_area_statistics(city_v02, summary_v02)
+    
+    # All figures are drawn at the end, in parallel, from the summary arrays;
+    # unchanged figures from a previous run are not redrawn
+    jobs = [
+        {'kind': 'wealth', 'summary': summary_v0, 'filename': 'reports/graph1.png'},
+        {'kind': 'area_comparison', 'summary': summary_v0, 'filename': 'reports/graph2_v0.png'},
+        {'kind': 'wealth', 'summary': summary_v02, 'filename': 'reports/graph1_v02.png'},
+        {'kind': 'area_comparison', 'summary': summary_v02, 'filename': 'reports/graph2_v02.png'},
+    ]
+    status = render_reports(jobs, formats=args.formats, dpi=args.dpi, force=args.force_render)
     
     # Summary statistics
     print("\n" + "=" * 60)
     print("SIMULATION RESULTS SUMMARY")
     print("=" * 60)
-    print(f"Total hosts: {len(host_data_v0)}")
+    print(f"Total hosts: {len(summary_v0['wealth'])}")
     print(f"Total simulation steps: {city_v0.step}")
     
     print("\n" + "=" * 60)
     print("✓ All graphs saved to reports/ folder:")
-    print("  - graph1.png (wealth by host, v0)")
-    print("  - graph2_v0.png (area comparison, v0)")
-    print("  - graph1_v02.png (wealth by host, v02)")
-    print("  - graph2_v02.png (area comparison, v02)")
+    descriptions = ['wealth by host, v0', 'area comparison, v0', 'wealth by host, v02', 'area comparison, v02']
+    for job, description in zip(jobs, descriptions):
+        for path in output_paths(job['filename'], args.formats).values():
+            print(f"  - {os.path.basename(path)} ({description}, {status[path]})")
     print("=" * 60)
+    
+    if args.profile_json:
+        with open(args.profile_json, 'w') as f:
+            json.dump(profiles, f, indent=2)
+        print(f"Profile saved: {args.profile_json}")
 
 
 if __name__ == "__main__":
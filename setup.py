@@ -6,8 +6,8 @@ setup(
     packages=find_packages(),
     install_requires=[
         "matplotlib>=3.5.0",
-        "numpy>=1.21.0",
+        "numpy>=1.25.0",
         "pandas>=1.3.0",
     ],
-    python_requires=">=3.8",
+    python_requires=">=3.9",
 )
\ No newline at end of file
@@ -0,0 +1,176 @@
+import numpy as np
+
+
+def concentration(values, fractions=(0.01, 0.1)):
+    
+    # All concentration metrics of a distribution (listings, places or wealth per
+    # holder) from one sort and one cumulative sum:
+    #   gini  - 0 = equal, 1 = one holder has everything
+    #   hhi   - Herfindahl-Hirschman index, sum of squared shares (1/n .. 1)
+    #   top_1pct_share, top_10pct_share - share held by the top 1% / 10% of
+    #           holders (at least one holder)
+    values = np.sort(np.asarray(values, dtype=np.float64))
+    n = len(values)
+    cumulative = np.cumsum(values)
+    total = cumulative[-1] if n else 0.0
+    
+    result = {'holders': n, 'total': float(total)}
+    if n == 0 or total == 0:
+        result.update({'gini': 0.0, 'hhi': 0.0})
+        for fraction in fractions:
+            result[_share_key(fraction)] = 0.0
+        return result
+    
+    result['gini'] = float((n + 1 - 2 * cumulative.sum() / total) / n)
+    result['hhi'] = float(np.sum((values / total) ** 2))
+    for fraction in fractions:
+        k = max(1, int(n * fraction))
+        held_by_rest = cumulative[n - k - 1] if k < n else 0.0
+        result[_share_key(fraction)] = float((total - held_by_rest) / total)
+    
+    return result
+
+
+def _share_key(fraction):
+    
+    return f"top_{fraction * 100:g}pct_share"
+
+
+def gini(values):
+    
+    return concentration(values, fractions=())['gini']
+
+
+def top_share(values, fraction=0.1):
+    
+    return concentration(values, fractions=(fraction,))[_share_key(fraction)]
+
+
+def lorenz_curve(values, descending=False, points=None):
+    
+    # Cumulative share of holders (x) against cumulative share of the total (y),
+    # both starting at 0. descending=True orders holders from largest to smallest
+    # (the notebook's "top hosts control..." curve). points resamples the curve
+    # to at most that many points for plotting.
+    values = np.sort(np.asarray(values, dtype=np.float64))
+    if descending:
+        values = values[::-1]
+    n = len(values)
+    total = values.sum()
+    
+    x = np.arange(n + 1) / max(n, 1)
+    y = np.concatenate(([0.0], np.cumsum(values))) / (total if total else 1.0)
+    
+    if points is not None and n + 1 > points:
+        idx = np.linspace(0, n, points).round().astype(np.int64)
+        x, y = x[idx], y[idx]
+    
+    return x, y
+
+
+def listing_counts(listings, host_column='host_id'):
+    
+    # Listings per host of a listings table, without a pandas groupby
+    _, counts = np.unique(listings[host_column].to_numpy(), return_counts=True)
+    return counts
+
+
+def listings_concentration(listings, host_column='host_id'):
+    
+    # Concentration of listings across hosts, plus the multi-listing figures
+    # reported by the Part 2 notebook
+    counts = listing_counts(listings, host_column)
+    result = concentration(counts)
+    
+    multi = counts[counts >= 2]
+    result['multi_listing_hosts'] = int(len(multi))
+    result['multi_listing_host_share'] = len(multi) / len(counts) if len(counts) else 0.0
+    result['multi_listing_share'] = multi.sum() / counts.sum() if len(counts) else 0.0
+    result['top_10_hosts_listings'] = int(np.sort(counts)[::-1][:10].sum())
+    return result
+
+
+def city_concentration(city, by='wealth'):
+    
+    # Concentration of wealth or of places (by='assets') across the hosts of a City
+    if by == 'wealth':
+        return concentration(city_wealth(city))
+    if by == 'assets':
+        return concentration(city_asset_counts(city))
+    raise ValueError(f"Unknown measure: {by!r} (expected 'wealth' or 'assets')")
+
+
+def city_wealth(city):
+    
+    # Wealth per host (profits + ask price of every owned place), in city.hosts
+    # order; O(hosts) since portfolio values are maintained on every transaction
+    engine = city._array_engine
+    if engine is not None:
+        return engine.profits + engine.portfolio
+    
+    return np.array([host.wealth for host in city.hosts], dtype=np.float64)
+
+
+def city_portfolio_values(city):
+    
+    # Ask price of every owned place summed per host, in city.hosts order
+    engine = city._array_engine
+    if engine is not None:
+        return engine.portfolio.copy()
+    
+    return np.array([host.portfolio_value for host in city.hosts], dtype=np.float64)
+
+
+def area_wealth(city):
+    
+    # Hosts, total, mean, min and max wealth per area of origin, as arrays
+    # indexed by position in 'area'
+    wealth = city_wealth(city)
+    areas, index = np.unique(city_host_areas(city), return_inverse=True)
+    hosts = np.bincount(index, minlength=len(areas))
+    total = np.bincount(index, weights=wealth, minlength=len(areas))
+    low = np.full(len(areas), np.inf)
+    high = np.full(len(areas), -np.inf)
+    np.minimum.at(low, index, wealth)
+    np.maximum.at(high, index, wealth)
+    return {'area': areas, 'hosts': hosts, 'total': total, 'mean': total / hosts, 'min': low, 'max': high}
+
+
+def city_profits(city):
+    
+    # Available profits per host, in city.hosts order (a copy)
+    engine = city._array_engine
+    if engine is not None:
+        return engine.profits.copy()
+    
+    return np.array([host.profits for host in city.hosts], dtype=np.float64)
+
+
+def city_host_ids(city):
+    
+    # host_id per host, in city.hosts order
+    engine = city._array_engine
+    if engine is not None:
+        return engine.host_ids
+    
+    return np.array([host.host_id for host in city.hosts], dtype=np.int64)
+
+
+def city_asset_counts(city):
+    
+    # Number of places owned per host, in city.hosts order
+    engine = city._array_engine
+    if engine is not None:
+        return np.bincount(engine.owner, minlength=len(engine.profits))
+    
+    return np.array([len(host.assets) for host in city.hosts], dtype=np.int64)
+
+
+def city_host_areas(city):
+    
+    # Area of origin per host, in city.hosts order
+    engine = city._array_engine
+    if engine is not None:
+        return engine.host_area
+    
+    return np.array([host.area for host in city.hosts])
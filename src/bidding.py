@@ -0,0 +1,290 @@
+from functools import partial
+
+import numpy as np
+
+
+# A bidding policy decides which (buyer, place) opportunities become bids and at
+# what price. Opportunities of all hosts are evaluated together as parallel
+# arrays (Opportunities); a filter is a function Opportunities -> bool mask and a
+# price function is Opportunities -> bid prices. Filters must only depend on the
+# buyer and the place of each row, so the engines may deduplicate rows freely.
+# Rules are module-level functions (or partials of them) so that policies can
+# be pickled and sent to worker processes.
+
+
+class ObjectState:
+
+    # Per-place and per-host arrays of the object engine, built on first use.
+    # Attribute names match ArrayEngine so Opportunities works on either.
+
+    def __init__(self, city):
+        self.city = city
+        self.size = city.size
+        self.places = city._places
+        self.hosts = city._hosts
+        self.host_index = {host.host_id: i for i, host in enumerate(self.hosts)}
+        self.host_ids = np.array([host.host_id for host in self.hosts], dtype=np.int64)
+        self._arrays = {}
+
+    def __getattr__(self, name):
+
+        # Only reached for attributes not set in __init__
+        builders = {
+            'ask': lambda: [place.ask_price for place in self.places],
+            'profits': lambda: [host.profits for host in self.hosts],
+            'area': lambda: [place.area for place in self.places],
+            'host_area': lambda: [host.area for host in self.hosts],
+            'owner': lambda: [self.host_index[place.host_id] for place in self.places],
+        }
+        if name not in builders:
+            raise AttributeError(name)
+        if name not in self._arrays:
+            self._arrays[name] = np.array(builders[name]())
+        return self._arrays[name]
+
+
+class _Column:
+
+    # Lazy column over a list of places or hosts: indexing reads only the
+    # requested rows; a rule that needs the whole column (np.bincount) gets
+    # every row through __array__
+    def __init__(self, items, value, dtype):
+        self.items = items
+        self.value = value
+        self.dtype = dtype
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        items = self.items
+        value = self.value
+        return np.fromiter((value(items[i]) for i in np.asarray(index).tolist()), dtype=self.dtype)
+
+    def __array__(self, dtype=None, copy=None):
+        values = self[np.arange(len(self.items))]
+        return values if dtype is None else values.astype(dtype)
+
+
+class SubsetState:
+
+    # ObjectState for a few hosts (Host.make_bids, City.collect_bids(hosts=...)):
+    # the host arrays cover those hosts, in order, followed by the owners of the
+    # places they look at as they come up, and place values are only read for
+    # the rows being evaluated, so the cost follows the frontiers instead of the
+    # city size. Host indices are positions in self.hosts, not in city.hosts.
+
+    def __init__(self, city, hosts):
+        self.city = city
+        self.size = city.size
+        self.places = city._places
+        self.hosts = list(hosts)
+        self.host_index = {host.host_id: i for i, host in enumerate(self.hosts)}
+
+        self.ask = _Column(self.places, lambda place: place.ask_price, np.float64)
+        self.area = _Column(self.places, lambda place: place.area, np.int64)
+        self.owner = _Column(self.places, lambda place: self._index(place.host_id), np.int64)
+        self.profits = _Column(self.hosts, lambda host: host.profits, np.float64)
+        self.host_area = _Column(self.hosts, lambda host: host.area, np.int64)
+        self.host_ids = _Column(self.hosts, lambda host: host.host_id, np.int64)
+
+    def _index(self, host_id):
+        index = self.host_index.get(host_id)
+        if index is None:
+            index = len(self.hosts)
+            self.hosts.append(self.city._host_dict[host_id])
+            self.host_index[host_id] = index
+        return index
+
+
+class Opportunities:
+
+    # Parallel arrays: buyer (index into the host arrays) and target (place_id),
+    # with per-row values looked up from the engine state when a filter asks
+
+    def __init__(self, state, buyer, target):
+        self.state = state
+        self.buyer = buyer
+        self.target = target
+
+    def __len__(self):
+        return len(self.buyer)
+
+    def take(self, index):
+        return Opportunities(self.state, self.buyer[index], self.target[index])
+
+    def unique(self):
+
+        # Drop repeated (buyer, target) rows, ordered by buyer then target
+        num_places = len(self.state.ask)
+        keys = np.unique(self.buyer * num_places + self.target)
+        return Opportunities(self.state, keys // num_places, keys % num_places)
+
+    @property
+    def ask(self):
+        return self.state.ask[self.target]
+
+    @property
+    def profits(self):
+        return self.state.profits[self.buyer]
+
+    @property
+    def area(self):
+        return self.state.area[self.target]
+
+    @property
+    def host_area(self):
+        return self.state.host_area[self.buyer]
+
+    @property
+    def asset_counts(self):
+        counts = np.bincount(self.state.owner, minlength=len(self.state.profits))
+        return counts[self.buyer]
+
+    @property
+    def seller(self):
+        return self.state.owner[self.target]
+
+
+# Filters
+
+def affordable(bids):
+
+    # The host's available profits cover the current ask price
+    return bids.profits >= bids.ask
+
+
+def same_area(bids):
+
+    # v02 rule: hosts only buy in their area of origin
+    return bids.area == bids.host_area
+
+
+def below_limit(bids, limit):
+
+    # The buyer holds fewer than limit places
+    return bids.asset_counts < limit
+
+
+def max_portfolio(limit):
+
+    # Hosts holding limit places or more stop bidding
+    return partial(below_limit, limit=limit)
+
+
+def within_distance(bids, cells):
+
+    # Chebyshev distance between each target and the centre of its buyer's portfolio
+    state = bids.state
+    size = state.size
+    owner = state.owner
+    place_ids = np.arange(len(owner))
+    counts = np.bincount(owner, minlength=len(state.profits))
+    counts = np.maximum(counts, 1)
+    row = np.bincount(owner, weights=place_ids // size, minlength=len(counts)) / counts
+    col = np.bincount(owner, weights=place_ids % size, minlength=len(counts)) / counts
+    distance = np.maximum(np.abs(bids.target // size - row[bids.buyer]),
+                          np.abs(bids.target % size - col[bids.buyer]))
+    return distance <= cells
+
+
+def max_distance(cells):
+
+    # Only places within cells grid steps of the centre of the buyer's current portfolio
+    return partial(within_distance, cells=cells)
+
+
+# Bid prices
+
+def bid_all_profits(bids):
+
+    # The host offers everything it has (the original rule)
+    return bids.profits.astype(np.float64)
+
+
+def surplus_fraction(bids, fraction):
+
+    # Ask price plus fraction of the buyer's profits above it
+    ask = bids.ask
+    return ask + fraction * (bids.profits - ask)
+
+
+def bid_fraction(fraction):
+
+    # Hosts keep part of their surplus instead of offering all their profits
+    return partial(surplus_fraction, fraction=fraction)
+
+
+class BiddingPolicy:
+
+    def __init__(self, filters=(), price=bid_all_profits, name=None):
+
+        # filters run after affordable(), cheapest first is fastest since each
+        # filter only sees the rows that passed the previous ones.
+        # price must return a bid between the ask price and the host's profits.
+        self.filters = (affordable,) + tuple(filters)
+        self.price = price
+        self.name = name
+
+    def with_filters(self, *filters, name=None):
+
+        # Same policy with extra filters (e.g. DEFAULT_POLICY.with_filters(max_portfolio(10)))
+        return BiddingPolicy(self.filters[1:] + filters, self.price, name)
+
+    def select(self, bids):
+
+        # Rows passing every filter, in their original order
+        for rule in self.filters:
+            if not len(bids):
+                break
+            bids = bids.take(np.flatnonzero(rule(bids)))
+        return bids
+
+    def bid_prices(self, bids):
+
+        # Bid price and spread (bid price - ask) per row
+        bid_price = np.asarray(self.price(bids), dtype=np.float64)
+        return bid_price, bid_price - bids.ask
+
+    def __repr__(self):
+        names = [getattr(rule, '__name__', None) or rule.func.__name__ for rule in self.filters]
+        return f"BiddingPolicy(name={self.name!r}, filters={names})"
+
+
+DEFAULT_POLICY = BiddingPolicy(name='v0')
+SAME_AREA_POLICY = BiddingPolicy([same_area], name='v02')
+
+# Named policies of the bidding versions compared in main.py
+POLICIES = {'v0': DEFAULT_POLICY, 'v02': SAME_AREA_POLICY}
+
+
+def frontier_opportunities(city, hosts=None, subset=False):
+
+    # Opportunities of the object engine: every host's frontier, in host order
+    # and frontier order (the order the per-host loops used to produce bids in).
+    # With subset, the given hosts are evaluated on a SubsetState (same bids,
+    # but buyer/seller indices are not positions in city.hosts).
+    state = SubsetState(city, hosts) if subset else ObjectState(city)
+    hosts = state.hosts if hosts is None else hosts
+
+    buyers = []
+    targets = []
+    for host in hosts:
+        frontier = host.frontier
+        buyers.extend([state.host_index[host.host_id]] * len(frontier))
+        targets.extend(frontier)
+
+    return Opportunities(state, np.array(buyers, dtype=np.int64), np.array(targets, dtype=np.int64))
+
+
+def bid_records(bids, bid_price, spread):
+
+    # Bid dictionaries consumed by City.approve_bids/execute_transactions
+    host_ids = bids.state.host_ids
+    rows = zip(bids.target.tolist(), host_ids[bids.seller].tolist(), host_ids[bids.buyer].tolist(),
+               spread.tolist(), bid_price.tolist())
+    return [
+        {'place_id': place_id, 'seller_id': seller_id, 'buyer_id': buyer_id,
+         'spread': bid_spread, 'bid_price': price}
+        for place_id, seller_id, buyer_id, bid_spread, price in rows
+    ]
@@ -1,25 +1,190 @@
-import pandas as pd
+import numpy as np
 from .place import Place
 from .hosts import Host
+from .engine import ArrayEngine
+from .tiles import TiledEngine
+from .market import match_bids
+from .scheduler import min_ask_per_host
+from .bidding import DEFAULT_POLICY, SAME_AREA_POLICY, frontier_opportunities, bid_records
+from .grid import grid_neighbours
+from .listings import listings_to_grid
+from .snapshot import snapshot_city, restore_city, save_snapshot, load_snapshot
+
+
+# 'object' = Place/Host objects, 'array' = NumPy arrays, 'tiled' = NumPy arrays
+# with the local phases split over worker processes
+ENGINES = ('object', 'array', 'tiled')
 
 
 class City:
     
-    def __init__(self, size, area_rates):
+    def __init__(self, size, area_rates, engine='object', rng=None, initialize=True, tiles=None):
+        
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine!r} (expected one of {ENGINES})")
         
         self.size = size
         self.area_rates = area_rates
+        self.engine = engine
+        
+        # Block layout (row_blocks, col_blocks) of the tiled engine, None = one
+        # row band per CPU (see tiles.TiledEngine)
+        self.tiles = tiles
+        self.same_area_rule = False
+        
+        # Bidding rules (see bidding.BiddingPolicy); None = v0, or v02 when
+        # same_area_rule is set
+        self.bidding_policy = None
+        
+        # Area labels (e.g. neighbourhood names) for cities built from real data
+        self.area_names = None
+        
+        # Optional per-step hooks, None = disabled
+        # (see recorder.MetricsRecorder and profiling.StepProfiler)
+        self.recorder = None
+        self.profiler = None
+        
+        # Optional append-only transaction log (see eventlog.TransactionLog)
+        self.event_log = None
+        
+        # Optional sparse bidding (see scheduler.ActiveSet), None = every host bids every step
+        self.scheduler = None
+        
+        # Tie-breaking between equal spreads in approve_bids, see market.SORT_KINDS
+        self.bid_sort_kind = 'quicksort'
         self.step = 0
         
+        # Per-city random Generator (a seed, SeedSequence or Generator is accepted),
+        # so several cities can run side by side without sharing random state
+        self.rng = np.random.default_rng(rng)
+        
         # Will be populated by initialize()
-        self.places = []
-        self.hosts = []
+        self._places = []
+        self._hosts = []
         
-        # Dictionary for quick place lookup by ID
+        # Dictionaries for quick place and host lookup by ID
         self._place_dict = {}
+        self._host_dict = {}
         
-        # Initialize the city
-        self.initialize()
+        # Initialize the city (initialize=False leaves it empty for restore_city
+        # and initialize_bulk)
+        self._array_engine = None
+        if initialize:
+            self.initialize()
+            self.start_engine()
+    
+    def start_engine(self):
+        
+        # The array engine keeps the hot state in NumPy arrays and the
+        # Place/Host objects become views that are refreshed on access;
+        # the tiled engine also spreads the local phases over processes
+        if self.engine == 'array':
+            self._array_engine = ArrayEngine(self)
+        elif self.engine == 'tiled':
+            self._array_engine = TiledEngine(self, tiles=self.tiles)
+    
+    def _restart_engine(self):
+        
+        # Rebuild the engine arrays from the objects (e.g. after the host count changed)
+        self.close()
+        self._array_engine = None
+        self.start_engine()
+    
+    def close(self):
+        
+        # Release the worker processes and shared memory of the tiled engine
+        if isinstance(self._array_engine, TiledEngine):
+            self._array_engine.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    @classmethod
+    def build(cls, size, area_rates, engine='array', rng=None):
+        
+        # Bulk constructor: all areas and rates come from two vectorized draws and
+        # Place/Host objects are only created when first accessed. The draws are
+        # ordered differently from initialize(), so a seed gives a different city.
+        city = cls(size, area_rates, engine=engine, rng=rng, initialize=False)
+        city.initialize_bulk()
+        return city
+    
+    def initialize_bulk(self):
+        
+        num_places = self.size * self.size
+        
+        # Area (quadrant) and nightly rate for every place, same intervals as Place.setup
+        areas = self.rng.integers(0, 4, size=num_places)
+        bounds = np.array([self.area_rates.get(area, (50, 200)) for area in range(4)], dtype=np.float64)
+        rates = self.rng.uniform(bounds[areas, 0], bounds[areas, 1])
+        
+        self._initialize_arrays({'rate': rates, 'area': areas})
+    
+    @classmethod
+    def from_listings(cls, listings, engine='array', rng=None, size=None):
+        
+        # City seeded from a real listings table (see listings.read_listings):
+        # neighbourhoods become areas, observed nightly prices become rates and
+        # multi-listing hosts start with all their listings as assets
+        rng = np.random.default_rng(rng)
+        grid = listings_to_grid(listings, size=size, rng=rng)
+        
+        city = cls(grid['size'], grid['area_rates'], engine=engine, rng=rng, initialize=False)
+        city.area_names = grid['area_names']
+        city._initialize_arrays(grid)
+        return city
+    
+    def _initialize_arrays(self, arrays):
+        
+        # Bulk state goes straight into the array engine (objects are created lazily)
+        if self.engine == 'tiled':
+            self._array_engine = TiledEngine(self, arrays=arrays, tiles=self.tiles)
+        else:
+            self._array_engine = ArrayEngine(self, arrays=arrays)
+        
+        # The object engine works on the objects, so create them right away
+        if self.engine == 'object':
+            self._refresh_objects()
+            self._array_engine = None
+    
+    def _refresh_objects(self):
+        
+        # Bring the Place/Host objects up to date with the array engine
+        # (creating them first for a bulk-built city)
+        engine = self._array_engine
+        if engine is not None:
+            if engine.price_log is not None:
+                engine.materialize()
+            engine.sync()
+    
+    @property
+    def num_places(self):
+        
+        if self._array_engine is not None:
+            return len(self._array_engine.rate)
+        return len(self._places)
+    
+    @property
+    def num_hosts(self):
+        
+        if self._array_engine is not None:
+            return len(self._array_engine.profits)
+        return len(self._hosts)
+    
+    @property
+    def places(self):
+        
+        self._refresh_objects()
+        return self._places
+    
+    @property
+    def hosts(self):
+        
+        self._refresh_objects()
+        return self._hosts
     
     def initialize(self):
         
@@ -30,43 +195,100 @@ class City:
                 # Create place with unique ID and initial host ID (same as place ID)
                 place = Place(place_id=place_id, host_id=place_id, city=self)
                 
-                # Set up neighbors based on grid position
-                self._setup_neighbors(place, row, col)
-                
                 # Add to places list and lookup dictionary
-                self.places.append(place)
+                self._places.append(place)
                 self._place_dict[place_id] = place
                 
                 place_id += 1
         
         # Create Host instances - one for each place as initial owner
-        for place in self.places:
+        for place in self._places:
             host = Host(host_id=place.host_id, place=place, city=self)
-            self.hosts.append(host)
+            self._hosts.append(host)
+            self._host_dict[host.host_id] = host
     
-    def _setup_neighbors(self, place, row, col):
+    def get_neighbours(self, place_id):
         
-        neighbors = []
-        
-        # Check all 8 surrounding cells (unless on border)
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                if dr == 0 and dc == 0:  # Skip the place itself
-                    continue
-                
-                new_row, new_col = row + dr, col + dc
-                
-                # Check if neighbor is within grid bounds
-                if 0 <= new_row < self.size and 0 <= new_col < self.size:
-                    neighbor_id = new_row * self.size + new_col
-                    neighbors.append(neighbor_id)
-        
-        place.neighbours = neighbors
+        # Adjacent place_ids, derived from the grid position (nothing stored per place)
+        return grid_neighbours(place_id, self.size)
     
     def get_place(self, place_id):
         
+        self._refresh_objects()
         return self._place_dict.get(place_id)
     
+    def spawn_rngs(self, n):
+        
+        # Independent child Generators derived from this city's stream
+        return self.rng.spawn(n)
+    
+    def get_host(self, host_id):
+        
+        self._refresh_objects()
+        return self._host_dict.get(host_id)
+    
+    def add_host(self, host):
+        
+        # Objects first: a bulk-built city has no _host_dict entries until then
+        self._refresh_objects()
+        
+        if host.host_id in self._host_dict:
+            raise ValueError(f"Host {host.host_id} already exists")
+        
+        self._hosts.append(host)
+        self._host_dict[host.host_id] = host
+        
+        # The engine arrays are sized by host count, rebuild them from the objects
+        if self._array_engine is not None:
+            self._restart_engine()
+    
+    def remove_host(self, host_id):
+        
+        host = self.get_host(host_id)
+        if host is None:
+            raise KeyError(host_id)
+        if host.assets:
+            raise ValueError(f"Host {host_id} still owns {len(host.assets)} places")
+        
+        self._hosts.remove(host)
+        del self._host_dict[host_id]
+        
+        if self._array_engine is not None:
+            self._restart_engine()
+        
+        return host
+    
+    def snapshot(self):
+        
+        return snapshot_city(self)
+    
+    def save(self, path, compressed=False):
+        
+        save_snapshot(self, path, compressed=compressed)
+    
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        
+        return restore_city(cls, snapshot)
+    
+    @classmethod
+    def load(cls, path):
+        
+        return load_snapshot(cls, path)
+    
+    def fork(self, rng=None, **overrides):
+        
+        # Independent copy of the current state; rng reseeds the branch and
+        # overrides set attributes on it (e.g. same_area_rule=True). A tiled
+        # branch starts its own worker pool and must be close()d as well.
+        branch = restore_city(type(self), snapshot_city(self))
+        branch.bidding_policy = self.bidding_policy
+        if rng is not None:
+            branch.rng = np.random.default_rng(rng)
+        for name, value in overrides.items():
+            setattr(branch, name, value)
+        return branch
+    
     def get_area_mean_rate(self, area):
         
         if area in self.area_rates:
@@ -79,27 +301,15 @@ class City:
         if not bids:
             return []
         
-        # Convert bids to pandas DataFrame and sort by spread in descending order
-        df_bids = pd.DataFrame(bids)
-        df_bids = df_bids.sort_values('spread', ascending=False)
+        # Parallel arrays of the sort key and the matching constraints
+        spread = np.fromiter((bid['spread'] for bid in bids), dtype=np.float64, count=len(bids))
+        buyer_ids = [bid['buyer_id'] for bid in bids]
+        place_ids = [bid['place_id'] for bid in bids]
         
-        approved_transactions = []
-        buyers_used = set()  # Track buyers who have already made a purchase
-        places_sold = set()  # Track places that have already been sold
+        # Most competitive bids first, each buyer and each place at most once
+        approved = match_bids(buyer_ids, place_ids, spread, kind=self.bid_sort_kind)
         
-        # Evaluate each bid (most competitive first)
-        for _, bid in df_bids.iterrows():
-            buyer_id = bid['buyer_id']
-            place_id = bid['place_id']
-            
-            # Check if both buyer and property are still available
-            if buyer_id not in buyers_used and place_id not in places_sold:
-                # Approve the transaction
-                approved_transactions.append(bid.to_dict())
-                buyers_used.add(buyer_id)
-                places_sold.add(place_id)
-        
-        return approved_transactions
+        return [bids[i] for i in approved.tolist()]
     
     def execute_transactions(self, transactions):
         
@@ -112,14 +322,8 @@ class City:
             bid_price = transaction['bid_price']
             
             # Find buyer and seller hosts
-            buyer_host = None
-            seller_host = None
-            
-            for host in self.hosts:
-                if host.host_id == buyer_id:
-                    buyer_host = host
-                elif host.host_id == seller_id:
-                    seller_host = host
+            buyer_host = self._host_dict.get(buyer_id)
+            seller_host = self._host_dict.get(seller_id)
             
             if buyer_host is None or seller_host is None:
                 continue  # Skip if hosts not found
@@ -129,65 +333,142 @@ class City:
             if place is None:
                 continue  # Skip if place not found
             
+            # Update the place's host_id and record price history
+            # (the sale can raise the ask price the portfolios are valued at)
+            old_ask = place.ask_price
+            place.host_id = buyer_id
+            place.record_price(self.step, bid_price)
+            
             # Execute the transaction
             # Buyer pays the bid price and gains the property
             buyer_host.profits -= bid_price
-            buyer_host.add_asset(place_id)
+            buyer_host.add_asset(place_id, place.ask_price)
             
             # Seller receives the payment and loses the asset
             seller_host.profits += bid_price
-            seller_host.remove_asset(place_id)
-            
-            # Update the place's host_id and record price history
-            place.host_id = buyer_id
-            place.price[self.step] = bid_price
+            seller_host.remove_asset(place_id, old_ask)
             
             executed_transactions.append(transaction)
         
         return executed_transactions
     
+    def get_bidding_policy(self):
+        
+        if self.bidding_policy is not None:
+            return self.bidding_policy
+        return SAME_AREA_POLICY if self.same_area_rule else DEFAULT_POLICY
+    
+    def collect_bids(self, policy=None, hosts=None):
+        
+        # Evaluate the bidding policy over the frontiers of all hosts (or of the
+        # given hosts, at a cost proportional to their frontiers) in one batch
+        policy = policy or self.get_bidding_policy()
+        self._refresh_objects()
+        return self._make_bids(policy, frontier_opportunities(self, hosts, subset=hosts is not None))
+    
+    def _make_bids(self, policy, opportunities):
+        
+        bids = policy.select(opportunities)
+        bid_price, spread = policy.bid_prices(bids)
+        return bid_records(bids, bid_price, spread)
+    
     def clear_market(self):
         
+        # With a scheduler only the hosts that may afford an opportunity bid
+        active = None
+        hosts = None
+        if self.scheduler is not None:
+            active = self.scheduler.active(self.step, len(self._hosts))
+            hosts = [self._hosts[i] for i in active.tolist()]
+        
         # Collect all bids from hosts
-        all_bids = []
-        for host in self.hosts:
-            # Use make_bids_v02 if same_area_rule is enabled
-            if self.same_area_rule:
-                host_bids = host.make_bids_v02()
-            else:
-                host_bids = host.make_bids()
-            all_bids.extend(host_bids)
+        def bids():
+            opportunities = frontier_opportunities(self, hosts)
+            return opportunities, self._make_bids(self.get_bidding_policy(), opportunities)
+        
+        opportunities, all_bids = self._phase('bids', bids)
         
         # Approve bids
-        approved_transactions = self.approve_bids(all_bids)
+        approved_transactions = self._phase('approve', self.approve_bids, all_bids)
         
         # Execute approved transactions
         executed_transactions = []
         if approved_transactions:
-            executed_transactions = self.execute_transactions(approved_transactions)
+            executed_transactions = self._phase('execute', self.execute_transactions, approved_transactions)
+        
+        if self.scheduler is not None:
+            self._phase('schedule', self._reschedule, active, hosts, opportunities, executed_transactions)
+        
+        if self.profiler is not None:
+            num_active = len(self._hosts) if active is None else len(active)
+            self.profiler.count_market(len(all_bids), len(approved_transactions), len(executed_transactions), num_active)
         
         return executed_transactions
     
-    def iterate(self):
+    def _reschedule(self, active, hosts, opportunities, transactions):
         
-        # Increase the step counter
-        self.step += 1
+        # Upper bound of monthly income per active host: every place at its highest occupancy
+        places = self._place_dict
+        max_income = np.array([
+            sum(places[place_id].rate * places[place_id].max_occupancy() for place_id in host.assets)
+            for host in hosts
+        ], dtype=np.float64)
+        profits = np.array([host.profits for host in hosts], dtype=np.float64)
         
-        # Update occupancy for every place
-        for place in self.places:
-            place.update_occupancy()
+        # Asks read before the transactions can only be lower than the current ones
+        min_ask = min_ask_per_host(opportunities, len(self._hosts))
+        self.scheduler.reschedule(self.step, active, profits, min_ask[active], max_income)
+        
+        # Buyers and sellers have a new frontier, income and profits
+        host_index = opportunities.state.host_index
+        traders = [host_index[transaction[role]] for transaction in transactions for role in ('buyer_id', 'seller_id')]
+        self.scheduler.touch(np.array(traders, dtype=np.int64), self.step)
+    
+    def update_occupancy(self):
+        
+        # Update occupancy for every place from one batched draw
+        places = self.places
+        draws = self.rng.integers(0, 11, size=len(places)).tolist()
+        for place, draw in zip(places, draws):
+            place.update_occupancy(draw)
+    
+    def update_profits(self):
         
         # Update profits for every host
         for host in self.hosts:
             host.update_profits()
+    
+    def _phase(self, name, func, *args):
+        
+        # Run one phase of a step, timed only when a profiler is attached
+        if self.profiler is None:
+            return func(*args)
+        return self.profiler.time(name, func, *args)
+    
+    def iterate(self):
+        
+        # Increase the step counter
+        self.step += 1
+        
+        if self._array_engine is not None:
+            # Hand the whole step to the vectorized engine if selected
+            transactions = self._array_engine.iterate()
+        else:
+            self._phase('occupancy', self.update_occupancy)
+            self._phase('profits', self.update_profits)
+            
+            # Process transactions for this period
+            transactions = self.clear_market()
         
-        # Process transactions for this period and return the resulting list
-        transactions = self.clear_market()
+        if self.recorder is not None:
+            self._phase('record', self.recorder.record, self, transactions)
+        if self.event_log is not None:
+            self._phase('log', self.event_log.record, self, transactions)
         
         return transactions
     
     def __str__(self):
-        return f"City(size={self.size}, step={self.step}, places={len(self.places)}, hosts={len(self.hosts)})"
+        return f"City(size={self.size}, step={self.step}, places={self.num_places}, hosts={self.num_hosts})"
     
     def __repr__(self):
-        return f"City(size={self.size}, step={self.step}, places={len(self.places)}, hosts={len(self.hosts)}, area_rates={self.area_rates})"
\ No newline at end of file
+        return f"City(size={self.size}, step={self.step}, places={self.num_places}, hosts={self.num_hosts}, area_rates={self.area_rates}, engine={self.engine!r})"
\ No newline at end of file
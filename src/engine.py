@@ -0,0 +1,301 @@
+import numpy as np
+from .market import match_bids
+from .bidding import Opportunities
+from .scheduler import min_ask_per_host
+from .grid import grid_adjacency
+from .place import Place, PriceHistory
+from .hosts import Host
+
+
+class ArrayEngine:
+
+    def __init__(self, city, arrays=None):
+
+        # Initialize Args
+        self.city = city
+        self.size = city.size
+
+        # arrays (bulk construction) holds rate and area per place and optionally
+        # owner (index into host_ids), host_ids and host_area; without owner every
+        # place starts with its own host (host_id == place_id). Restored snapshots
+        # also pass ask, profits, occupancy, initial_price and price_log. No
+        # objects exist until materialize(). Without arrays the state is read
+        # from the objects.
+        if arrays is None:
+            self._load_objects(city._places, city._hosts)
+        else:
+            self._load_arrays(arrays)
+
+        num_places = len(self.rate)
+        self.occupancy = np.zeros(num_places, dtype=np.int64)
+        if arrays is not None and arrays.get('occupancy') is not None:
+            self.occupancy[:] = arrays['occupancy']
+
+        # Occupancy interval depends only on whether the rate is above the area mean,
+        # so the lower bound can be computed once (5-15 days above, 10-20 days otherwise)
+        areas, area_index = np.unique(self.area, return_inverse=True)
+        area_means = np.array([city.get_area_mean_rate(int(area)) for area in areas], dtype=np.float64)
+        self.occupancy_low = np.where(self.rate > area_means[area_index], 5, 10)
+
+        # Value of every host's portfolio (sum of ask prices), kept up to date by
+        # execute_transactions so wealth never needs a pass over the places
+        self.portfolio = np.bincount(self.owner, weights=self.ask, minlength=len(self.profits))
+        
+        # Grid adjacency in CSR form: neighbours of place i are
+        # neighbour_ids[neighbour_offsets[i]:neighbour_offsets[i + 1]]
+        self.neighbour_offsets, self.neighbour_ids = grid_adjacency(city.size)
+        degrees = np.diff(self.neighbour_offsets)
+        self.neighbour_source = np.repeat(np.arange(num_places, dtype=np.int64), degrees)
+
+        # Object views are only refreshed when somebody reads them
+        self.dirty = False
+
+    def _load_objects(self, places, hosts):
+
+        # Host lookup: host_id <-> position in the host arrays
+        self.host_ids = np.array([host.host_id for host in hosts], dtype=np.int64)
+        host_index = {host.host_id: i for i, host in enumerate(hosts)}
+        self.host_area = np.array([host.area for host in hosts], dtype=np.int16)
+        self.profits = np.array([host.profits for host in hosts], dtype=np.float64)
+
+        # Place state as parallel arrays indexed by place_id
+        self.rate = np.array([place.rate for place in places], dtype=np.float64)
+        self.area = np.array([place.area for place in places], dtype=np.int16)
+        self.owner = np.array([host_index[place.host_id] for place in places], dtype=np.int64)
+        self.ask = np.array([place.ask_price for place in places], dtype=np.float64)
+
+        # Price histories live on the Place objects
+        self.initial_price = None
+        self.price_log = None
+
+    def _load_arrays(self, arrays):
+
+        rate, area, owner = arrays['rate'], arrays['area'], arrays.get('owner')
+        host_ids, host_area = arrays.get('host_ids'), arrays.get('host_area')
+        num_places = len(rate)
+        if owner is None:
+            owner = np.arange(num_places)
+            host_ids = np.arange(num_places)
+            host_area = area
+
+        self.host_ids = np.asarray(host_ids, dtype=np.int64)
+        self.host_area = np.asarray(host_area, dtype=np.int16)
+        self.profits = np.zeros(len(self.host_ids), dtype=np.float64)
+        if arrays.get('profits') is not None:
+            self.profits[:] = arrays['profits']
+
+        self.rate = np.asarray(rate, dtype=np.float64)
+        self.area = np.asarray(area, dtype=np.int16)
+        self.owner = np.asarray(owner, dtype=np.int64)
+        self.ask = 900 * self.rate
+        if arrays.get('ask') is not None:
+            self.ask[:] = arrays['ask']
+
+        # Until the objects are materialized, sales are kept as (place, step, price)
+        # after an initial price at step 0
+        initial_price = arrays.get('initial_price')
+        self.initial_price = self.ask.copy() if initial_price is None else np.array(initial_price, dtype=np.float64)
+        self.price_log = list(arrays.get('price_log', ()))
+
+    def update_occupancy(self):
+
+        # One batched draw for every place instead of one randint per place
+        draws = self.city.rng.integers(0, 11, size=len(self.rate))
+        self.occupancy = self.occupancy_low + draws
+
+    def update_profits(self):
+
+        # Monthly earnings (rate * occupancy) accumulated onto each place's owner
+        earnings = self.rate * self.occupancy
+        self.profits += np.bincount(self.owner, weights=earnings, minlength=len(self.profits))
+
+    def opportunities(self, hosts=None):
+        
+        # Every (owner of a place, neighbour of that place) pair is an opportunity
+        # as long as the owner does not already hold the neighbour. hosts (indices
+        # into the host arrays) restricts the pairs to the places those hosts own.
+        if hosts is None:
+            sources = self.neighbour_source
+            targets = self.neighbour_ids
+        else:
+            selected = np.zeros(len(self.profits), dtype=bool)
+            selected[hosts] = True
+            places = np.flatnonzero(selected[self.owner])
+            
+            # CSR rows of the selected places, concatenated
+            starts = self.neighbour_offsets[places]
+            degrees = self.neighbour_offsets[places + 1] - starts
+            sources = np.repeat(places, degrees)
+            row_start = np.cumsum(degrees) - degrees
+            targets = self.neighbour_ids[np.arange(degrees.sum()) + np.repeat(starts - row_start, degrees)]
+        
+        buyers = self.owner[sources]
+        mask = self.owner[targets] != buyers
+        return Opportunities(self, buyers[mask], targets[mask])
+    
+    def make_bids(self, policy, opportunities=None):
+        
+        if opportunities is None:
+            opportunities = self.opportunities()
+        
+        # The policy filters run before deduplication (the same opportunity can be
+        # reached from several owned places), which keeps the unique() small
+        bids = policy.select(opportunities).unique()
+        bid_price, spread = policy.bid_prices(bids)
+        
+        return bids.buyer, bids.target, spread, bid_price
+    
+    def collect_bids(self, policy, active=None):
+        
+        # Bids of all hosts (or of the active ones) and, with active hosts, the
+        # cheapest ask on each host's frontier for the scheduler. Asks read
+        # before the transactions can only be lower than later ones.
+        opportunities = self.opportunities(active)
+        min_ask = None
+        if active is not None:
+            min_ask = min_ask_per_host(opportunities, len(self.profits))
+        return self.make_bids(policy, opportunities), min_ask
+    
+    def execute_transactions(self, buyers, targets, spread, bid_price):
+
+        step = self.city.step
+        places = self.city._places
+        executed_transactions = []
+
+        for buyer, target, bid_spread, price in zip(
+            buyers.tolist(), targets.tolist(), spread.tolist(), bid_price.tolist()
+        ):
+            seller = int(self.owner[target])
+
+            # Buyer pays the bid price and gains the property, seller receives it
+            self.profits[buyer] -= price
+            self.profits[seller] += price
+            self.owner[target] = buyer
+
+            # Price history stays on the Place object (or in the log until the
+            # objects exist), the engine keeps the ask price (highest recorded)
+            if self.price_log is None:
+                places[target].record_price(step, price)
+            else:
+                self.price_log.append((target, step, price))
+            old_ask = self.ask[target]
+            if price > old_ask:
+                self.ask[target] = price
+            self.portfolio[seller] -= old_ask
+            self.portfolio[buyer] += self.ask[target]
+
+            executed_transactions.append({
+                'place_id': target,
+                'seller_id': int(self.host_ids[seller]),
+                'buyer_id': int(self.host_ids[buyer]),
+                'spread': bid_spread,
+                'bid_price': price
+            })
+
+        return executed_transactions
+
+    def clear_market(self):
+        
+        city = self.city
+        scheduler = city.scheduler
+        
+        # With a scheduler only the hosts that may afford an opportunity bid
+        active = None
+        if scheduler is not None:
+            active = scheduler.active(city.step, len(self.profits))
+        
+        (buyers, targets, spread, bid_price), min_ask = city._phase(
+            'bids', self.collect_bids, city.get_bidding_policy(), active
+        )
+        
+        executed_transactions = []
+        approved = []
+        traders = np.zeros(0, dtype=np.int64)
+        if len(buyers):
+            approved = city._phase('approve', match_bids, buyers, targets, spread, city.bid_sort_kind)
+            # Buyers and sellers (read before the owners change) of this step
+            traders = np.concatenate((buyers[approved], self.owner[targets[approved]]))
+            executed_transactions = city._phase(
+                'execute', self.execute_transactions,
+                buyers[approved], targets[approved], spread[approved], bid_price[approved]
+            )
+        
+        if scheduler is not None:
+            city._phase('schedule', self.reschedule, active, min_ask, traders)
+        
+        if city.profiler is not None:
+            num_active = len(self.profits) if active is None else len(active)
+            city.profiler.count_market(len(buyers), len(approved), len(executed_transactions), num_active)
+        
+        return executed_transactions
+    
+    def reschedule(self, active, min_ask, traders):
+        
+        # Upper bound of monthly income: every place at its highest occupancy
+        max_income = np.bincount(self.owner, weights=self.rate * (self.occupancy_low + 10), minlength=len(self.profits))
+        
+        scheduler = self.city.scheduler
+        step = self.city.step
+        scheduler.reschedule(step, active, self.profits[active], min_ask[active], max_income[active])
+        
+        # Buyers and sellers have a new frontier, income and profits
+        scheduler.touch(traders, step)
+    
+    def iterate(self):
+
+        self.city._phase('occupancy', self.update_occupancy)
+        self.city._phase('profits', self.update_profits)
+        transactions = self.clear_market()
+
+        self.dirty = True
+
+        return transactions
+
+    def materialize(self):
+
+        # Create the Place/Host objects of a bulk-built city on first access
+        city = self.city
+        price_history = [PriceHistory(0, price) for price in self.initial_price.tolist()]
+        for place_id, step, price in self.price_log:
+            price_history[place_id].append(step, price)
+
+        owner_ids = self.host_ids[self.owner].tolist()
+        rows = zip(owner_ids, self.rate.tolist(), self.area.tolist(), price_history)
+        for place_id, (host_id, rate, area, price) in enumerate(rows):
+            place = Place.from_state(place_id, host_id, city, area, rate, price)
+            city._places.append(place)
+            city._place_dict[place_id] = place
+
+        for host_id, area in zip(self.host_ids.tolist(), self.host_area.tolist()):
+            host = Host.from_state(host_id, city, area, 0, ())
+            city._hosts.append(host)
+            city._host_dict[host_id] = host
+
+        # From now on the objects carry the price history; sync fills in the rest
+        self.initial_price = None
+        self.price_log = None
+        self.dirty = True
+
+    def sync(self):
+
+        # Write the array state back onto the Place and Host objects
+        if not self.dirty:
+            return
+        self.dirty = False
+
+        places = self.city._places
+        hosts = self.city._hosts
+
+        occupancy = self.occupancy.tolist()
+        owner_ids = self.host_ids[self.owner].tolist()
+        for place, place_occupancy, host_id in zip(places, occupancy, owner_ids):
+            place.occupancy = place_occupancy
+            place.host_id = host_id
+
+        assets = [set() for _ in hosts]
+        for place_id, owner in enumerate(self.owner.tolist()):
+            assets[owner].add(place_id)
+
+        for host, profits, host_assets in zip(hosts, self.profits.tolist(), assets):
+            host.profits = profits
+            host.reset_assets(host_assets)
@@ -0,0 +1,296 @@
+import glob
+import json
+import os
+
+import numpy as np
+from .snapshot import restore_rng
+
+
+# Bumped whenever the on-disk layout changes
+EVENT_LOG_VERSION = 1
+
+# One fixed-width record per executed transaction, in execution order
+EVENT_DTYPE = np.dtype([
+    ('step', np.int32),
+    ('place_id', np.int64),
+    ('seller_id', np.int64),
+    ('buyer_id', np.int64),
+    ('price', np.float64),
+])
+
+# Layout of a log directory:
+#   meta.json              - version, dtype, checkpoint interval
+#   static.npz             - per-place rate and minimum occupancy, host ids
+#   events.bin             - EVENT_DTYPE records, opened with np.memmap
+#   checkpoint_<step>.npz  - owners, profits, asks and RNG state after <step>
+
+
+def city_state(city):
+
+    # Replayable state of a city: owner host_id and ask price per place,
+    # available profits per host and the random stream
+    engine = city._array_engine
+    if engine is not None:
+        owner_ids = engine.host_ids[engine.owner]
+        ask = engine.ask.copy()
+        profits = engine.profits.copy()
+    else:
+        owner_ids = np.array([place.host_id for place in city.places], dtype=np.int64)
+        ask = np.array([place.ask_price for place in city.places], dtype=np.float64)
+        profits = np.array([host.profits for host in city.hosts], dtype=np.float64)
+    return {
+        'step': np.int64(city.step),
+        'owner_id': owner_ids,
+        'ask': ask,
+        'profits': profits,
+        'rng_state': np.array(json.dumps(city.rng.bit_generator.state)),
+    }
+
+
+def _static_arrays(city):
+
+    engine = city._array_engine
+    if engine is not None:
+        return {'rate': engine.rate, 'occupancy_low': engine.occupancy_low, 'host_ids': engine.host_ids}
+    return {
+        'rate': np.array([place.rate for place in city.places], dtype=np.float64),
+        'occupancy_low': np.array([place.min_occupancy() for place in city.places], dtype=np.int64),
+        'host_ids': np.array([host.host_id for host in city.hosts], dtype=np.int64),
+    }
+
+
+class TransactionLog:
+
+    def __init__(self, directory, city, checkpoint_every=50):
+
+        # Append-only log of a city's transactions from its current step on,
+        # with a full checkpoint every checkpoint_every steps. Attach with
+        # city.event_log = TransactionLog(directory, city); read with EventLog.
+        os.makedirs(directory, exist_ok=True)
+        for stale in glob.glob(os.path.join(directory, 'checkpoint_*.npz')):
+            os.remove(stale)
+
+        self.directory = directory
+        self.city = city
+        self.checkpoint_every = checkpoint_every
+        self.last_checkpoint = None
+        static = _static_arrays(city)
+        self.num_hosts = len(static['host_ids'])
+        np.savez(os.path.join(directory, 'static.npz'), **static)
+
+        meta = {
+            'version': EVENT_LOG_VERSION,
+            'dtype': EVENT_DTYPE.descr,
+            'checkpoint_every': checkpoint_every,
+            'first_step': city.step,
+        }
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+        self._events = open(os.path.join(directory, 'events.bin'), 'wb')
+        self.checkpoint(city)
+
+    def record(self, city, transactions):
+
+        # Called by City.iterate() after every step
+        if city.num_hosts != self.num_hosts:
+            raise ValueError("The host set changed; start a new TransactionLog")
+
+        if transactions:
+            records = np.array([
+                (city.step, t['place_id'], t['seller_id'], t['buyer_id'], t['bid_price'])
+                for t in transactions
+            ], dtype=EVENT_DTYPE)
+            self._events.write(records.tobytes())
+
+        if city.step % self.checkpoint_every == 0:
+            self.checkpoint(city)
+
+    def checkpoint(self, city):
+
+        # Events up to here are on disk before the checkpoint that follows them
+        self.flush()
+        np.savez(os.path.join(self.directory, f'checkpoint_{city.step:08d}.npz'), **city_state(city))
+        self.last_checkpoint = city.step
+
+    def flush(self):
+        self._events.flush()
+
+    def close(self):
+
+        # A final checkpoint marks how far the log goes
+        if self._events.closed:
+            return
+        if self.city.step != self.last_checkpoint:
+            self.checkpoint(self.city)
+        self._events.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class EventLog:
+
+    def __init__(self, directory):
+
+        # Read side of a TransactionLog directory (can be opened while the
+        # simulation is still writing; reopen to see newer steps)
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta['version'] != EVENT_LOG_VERSION:
+            raise ValueError(f"Unsupported event log version {meta['version']} (expected {EVENT_LOG_VERSION})")
+
+        self.directory = directory
+        self.first_step = meta['first_step']
+        with np.load(os.path.join(directory, 'static.npz')) as static:
+            self.rate = static['rate']
+            self.occupancy_low = static['occupancy_low']
+            self.host_ids = static['host_ids']
+
+        # host_id -> position in the host arrays
+        self._host_order = np.argsort(self.host_ids, kind='stable')
+        self._sorted_host_ids = self.host_ids[self._host_order]
+
+        # Only whole records are mapped (the writer may be half-way through one)
+        path = os.path.join(directory, 'events.bin')
+        count = os.path.getsize(path) // EVENT_DTYPE.itemsize
+        if count:
+            self.events = np.memmap(path, dtype=EVENT_DTYPE, mode='r', shape=(count,))
+        else:
+            self.events = np.zeros(0, dtype=EVENT_DTYPE)
+
+        paths = sorted(glob.glob(os.path.join(directory, 'checkpoint_*.npz')))
+        self.checkpoints = np.array([int(os.path.basename(path)[11:19]) for path in paths], dtype=np.int64)
+        self._place_order = None
+        self._place_ids = None
+
+    @property
+    def last_step(self):
+        # Last step whose events are all in the log: the writer may still be
+        # appending to the step of the latest event until a checkpoint follows
+        last = self.events['step'][-1] - 1 if len(self.events) else self.first_step
+        return int(max(last, self.checkpoints[-1]))
+
+    def host_index(self, host_ids):
+        return self._host_order[np.searchsorted(self._sorted_host_ids, host_ids)]
+
+    def events_between(self, start, stop):
+
+        # Events of steps start < step <= stop (events are in step order)
+        steps = self.events['step']
+        return self.events[np.searchsorted(steps, start, side='right'):np.searchsorted(steps, stop, side='right')]
+
+    def load_checkpoint(self, step):
+
+        # The latest checkpoint at or before step
+        self._check_step(step)
+        nearest = self.checkpoints[np.searchsorted(self.checkpoints, step, side='right') - 1]
+        path = os.path.join(self.directory, f'checkpoint_{nearest:08d}.npz')
+        with np.load(path) as data:
+            state = {name: data[name] for name in data.files}
+        state['step'] = int(state['step'])
+        state['rng_state'] = json.loads(str(state['rng_state']))
+        return state
+
+    def state_at(self, step):
+
+        # Owners, asks and profits after step: start from the nearest checkpoint
+        # and replay the steps in between. Earnings come from the same occupancy
+        # draws as the original run (the checkpoint holds the random state and
+        # the occupancy draw is the only one made per step), the market outcome
+        # comes from the log, so nothing is re-simulated.
+        state = self.load_checkpoint(step)
+        owner = self.host_index(state['owner_id'])
+        ask = state['ask']
+        profits = state['profits']
+        rng = restore_rng(state['rng_state'])
+
+        events = self.events_between(state['step'], step)
+        bounds = np.searchsorted(events['step'], np.arange(state['step'] + 1, step + 2)).tolist()
+        rows = list(zip(events['place_id'].tolist(), self.host_index(events['seller_id']).tolist(),
+                        self.host_index(events['buyer_id']).tolist(), events['price'].tolist()))
+        for i in range(step - state['step']):
+            draws = rng.integers(0, 11, size=len(self.rate))
+            earnings = self.rate * (self.occupancy_low + draws)
+            profits += np.bincount(owner, weights=earnings, minlength=len(profits))
+
+            # Transactions of the step in the order they were executed
+            for place_id, seller, buyer, price in rows[bounds[i]:bounds[i + 1]]:
+                profits[buyer] -= price
+                profits[seller] += price
+                owner[place_id] = buyer
+                if price > ask[place_id]:
+                    ask[place_id] = price
+
+        return {'step': step, 'owner_id': self.host_ids[owner], 'ask': ask, 'profits': profits}
+
+    def owners_at(self, step):
+
+        # host_id owning every place after step (ownership needs no earnings replay).
+        # A place sold more than once takes the buyer of its last sale: assignment
+        # with repeated indices does not guarantee which write wins.
+        state = self.load_checkpoint(step)
+        owner_ids = state['owner_id']
+        events = self.events_between(state['step'], step)
+        places, last = np.unique(events['place_id'][::-1], return_index=True)
+        owner_ids[places] = events['buyer_id'][::-1][last]
+        return owner_ids
+
+    def wealth_at(self, step):
+
+        # Wealth per host (profits + ask of every owned place), in host_ids order
+        state = self.state_at(step)
+        owner = self.host_index(state['owner_id'])
+        return state['profits'] + np.bincount(owner, weights=state['ask'], minlength=len(self.host_ids))
+
+    def owner_at(self, place_id, step):
+
+        # Who owned place_id after step: its last sale up to step, or its owner
+        # when the log started
+        self._check_step(step)
+        if self._place_order is None:
+            self._place_order = np.argsort(self.events['place_id'], kind='stable')
+            self._place_ids = self.events['place_id'][self._place_order]
+        start, stop = np.searchsorted(self._place_ids, [place_id, place_id + 1])
+        sales = self.events[self._place_order[start:stop]]
+        sales = sales[sales['step'] <= step]
+        if len(sales):
+            return int(sales['buyer_id'][-1])
+        return int(self.load_checkpoint(self.first_step)['owner_id'][place_id])
+
+    def portfolio_history(self, host_id):
+
+        # Purchases (change=+1) and sales (change=-1) of host_id in step order
+        events = self.events
+        involved = np.flatnonzero((events['buyer_id'] == host_id) | (events['seller_id'] == host_id))
+        history = np.empty(len(involved), dtype=[('step', np.int32), ('place_id', np.int64),
+                                                 ('change', np.int8), ('price', np.float64)])
+        history['step'] = events['step'][involved]
+        history['place_id'] = events['place_id'][involved]
+        history['change'] = np.where(events['buyer_id'][involved] == host_id, 1, -1)
+        history['price'] = events['price'][involved]
+        return history
+
+    def portfolio_at(self, host_id, step):
+
+        # Sorted place_ids owned by host_id after step
+        return np.flatnonzero(self.owners_at(step) == host_id)
+
+    def portfolio_sizes(self, host_id):
+
+        # Number of places held by host_id after every logged step (events of a
+        # step the writer may still be appending to are left out)
+        initial = np.count_nonzero(self.load_checkpoint(self.first_step)['owner_id'] == host_id)
+        history = self.portfolio_history(host_id)
+        history = history[history['step'] <= self.last_step]
+        steps = np.arange(self.first_step, self.last_step + 1)
+        changes = np.zeros(len(steps), dtype=np.int64)
+        np.add.at(changes, history['step'] - self.first_step, history['change'])
+        return steps, initial + np.cumsum(changes)
+
+    def _check_step(self, step):
+        if not self.first_step <= step <= self.last_step:
+            raise ValueError(f"Step {step} is outside the log ({self.first_step}-{self.last_step})")
@@ -0,0 +1,42 @@
+import numpy as np
+
+
+# Offsets of the 8 surrounding cells (row, col)
+NEIGHBOUR_OFFSETS = [(dr, dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1) if (dr, dc) != (0, 0)]
+
+
+def grid_neighbours(place_id, size):
+    
+    # place_ids of the (up to 8) cells around place_id on a size x size grid,
+    # computed from row/col so no per-place neighbour list has to be stored
+    row, col = divmod(place_id, size)
+    neighbours = []
+    for dr, dc in NEIGHBOUR_OFFSETS:
+        new_row, new_col = row + dr, col + dc
+        if 0 <= new_row < size and 0 <= new_col < size:
+            neighbours.append(new_row * size + new_col)
+    return neighbours
+
+
+def grid_adjacency(size):
+    
+    # Whole-grid adjacency in CSR form, built with array ops: the neighbours of
+    # place i are ids[offsets[i]:offsets[i + 1]], in the same order as grid_neighbours
+    num_places = size * size
+    rows, cols = np.divmod(np.arange(num_places, dtype=np.int64), size)
+    
+    candidates = []
+    valid = []
+    for dr, dc in NEIGHBOUR_OFFSETS:
+        new_rows, new_cols = rows + dr, cols + dc
+        candidates.append(new_rows * size + new_cols)
+        valid.append((new_rows >= 0) & (new_rows < size) & (new_cols >= 0) & (new_cols < size))
+    
+    # Shape (num_places, 8), flattened row by row keeps each place's neighbours together
+    candidates = np.stack(candidates, axis=1)
+    valid = np.stack(valid, axis=1)
+    
+    ids = candidates[valid]
+    offsets = np.concatenate(([0], np.cumsum(valid.sum(axis=1)))).astype(np.int64)
+    
+    return offsets, ids
@@ -1,5 +1,11 @@
+from .bidding import DEFAULT_POLICY, SAME_AREA_POLICY
+
+
 class Host:
     
+    # No per-instance __dict__: a city holds one Host per place
+    __slots__ = ('host_id', 'city', 'profits', 'area', 'assets', '_frontier', '_portfolio_value')
+    
     def __init__(self, host_id, place, city, profits=0):
         
         # Inititalize Args
@@ -13,6 +19,54 @@ class Host:
         # Host's initial place becomes its first asset
         # assets is a set containing the IDs of all properties the host owns
         self.assets = {place.place_id}
+        
+        # Bidding frontier and portfolio value, computed on first use
+        self._frontier = None
+        self._portfolio_value = None
+    
+    @classmethod
+    def from_state(cls, host_id, city, area, profits, assets):
+        
+        # Build a host from known state (snapshots, bulk construction)
+        host = cls.__new__(cls)
+        host.host_id = host_id
+        host.city = city
+        host.profits = profits
+        host.area = area
+        host.assets = set(assets)
+        host._frontier = None
+        host._portfolio_value = None
+        return host
+    
+    @property
+    def frontier(self):
+        
+        # frontier maps every place adjacent to an owned property (but not owned)
+        # to the number of owned properties it touches; once built it is kept up
+        # to date by add_asset/remove_asset so bidding never has to walk the
+        # whole portfolio
+        if self._frontier is None:
+            frontier = {}
+            for place_id in self.assets:
+                for neighbor_id in self._neighbours(place_id):
+                    if neighbor_id not in self.assets:
+                        frontier[neighbor_id] = frontier.get(neighbor_id, 0) + 1
+            self._frontier = frontier
+        return self._frontier
+    
+    @property
+    def portfolio_value(self):
+        
+        # Sum of the ask prices of all owned places; like the frontier it is
+        # computed once and then adjusted by add_asset/remove_asset
+        if self._portfolio_value is None:
+            self._portfolio_value = sum(self.city.get_place(place_id).ask_price for place_id in self.assets)
+        return self._portfolio_value
+    
+    @property
+    def wealth(self):
+        
+        return self.profits + self.portfolio_value
     
     def update_profits(self):
         
@@ -24,104 +78,77 @@ class Host:
                 monthly_earnings = place.rate * place.occupancy
                 self.profits += monthly_earnings
     
-    def make_bids(self):
-        
-        bids = []
+    def make_bids(self, policy=DEFAULT_POLICY):
         
-        # Identify all neighboring listings (opportunities) that are adjacent 
-        # to any currently owned properties but not yet owned
-        opportunities = set()
-        
-        for place_id in self.assets:
-            # Get the Place object for this owned property
-            place = self.city.get_place(place_id)
-            if place is not None:
-                # Add all neighbors that are not already owned
-                for neighbor_id in place.neighbours:
-                    if neighbor_id not in self.assets:
-                        opportunities.add(neighbor_id)
-        
-        # For each opportunity, evaluate and potentially make a bid
-        for opportunity_id in opportunities:
-            opportunity_place = self.city.get_place(opportunity_id)
-            if opportunity_place is None:
-                continue
-            
-            # Get the current sale price (ask_price) from the property's price dictionary
-            # Using the most recent entry
-            if opportunity_place.price:
-                ask_price = max(opportunity_place.price.values())
-            else:
-                continue  # Skip if no price history
-            
-            # If host's available profits are greater than or equal to asking price
-            if self.profits >= ask_price:
-                # Create a bid dictionary
-                bid = {
-                    'place_id': opportunity_id,
-                    'seller_id': opportunity_place.host_id,
-                    'buyer_id': self.host_id,
-                    'spread': self.profits - ask_price,
-                    'bid_price': self.profits
-                }
-                bids.append(bid)
-        
-        return bids
+        # Bids of this host alone; the city evaluates all hosts at once with
+        # City.collect_bids, this is the same evaluation restricted to one host
+        return self.city.collect_bids(policy, hosts=[self])
     
     def make_bids_v02(self):
         
-        bids = []
+        # Same as make_bids with the same-area rule active
+        return self.make_bids(SAME_AREA_POLICY)
+    
+    def add_asset(self, place_id, value=None):
         
-        # Identify all neighboring listings (opportunities) that are adjacent 
-        # to any currently owned properties but not yet owned
-        opportunities = set()
+        # value is the place's current ask price; without it the cached
+        # portfolio value is recomputed on next use
+        if place_id in self.assets:
+            return
+        self.assets.add(place_id)
+        self._revalue(value)
         
-        for place_id in self.assets:
-            # Get the Place object for this owned property
-            place = self.city.get_place(place_id)
-            if place is not None:
-                # Add all neighbors that are not already owned
-                for neighbor_id in place.neighbours:
-                    if neighbor_id not in self.assets:
-                        opportunities.add(neighbor_id)
-        
-        # For each opportunity, evaluate and potentially make a bid
-        for opportunity_id in opportunities: 
-            opportunity_place = self.city.get_place(opportunity_id)
-            if opportunity_place is None:
-                continue
-            
-            # Get the current sale price (ask_price) from the property's price dictionary
-            # Using the most recent entry
-            if opportunity_place.price:
-                ask_price = max(opportunity_place.price.values())
-            else:
-                continue  # Skip if no price history
-            
-            # If host's available profits are greater than or equal to asking price
-            if self.profits >= ask_price:
-                if opportunity_place.area != self.area:
-                    # Different area and rule is active → skip this opportunity
-                    continue
-                # Create a bid dictionary
-                bid = {
-                    'place_id': opportunity_id,
-                    'seller_id': opportunity_place.host_id,
-                    'buyer_id': self.host_id,
-                    'spread': self.profits - ask_price,
-                    'bid_price': self.profits
-                }
-                bids.append(bid)
-        
-        return bids
-    
-    def add_asset(self, place_id):
+        frontier = self._frontier
+        if frontier is None:
+            return
         
-        self.assets.add(place_id)
+        # The new asset leaves the frontier and its neighbours join it
+        frontier.pop(place_id, None)
+        for neighbor_id in self._neighbours(place_id):
+            if neighbor_id not in self.assets:
+                frontier[neighbor_id] = frontier.get(neighbor_id, 0) + 1
     
-    def remove_asset(self, place_id):
+    def remove_asset(self, place_id, value=None):
         
+        # value is the ask price the place was counted at in the portfolio value
+        if place_id not in self.assets:
+            return
         self.assets.discard(place_id)
+        self._revalue(None if value is None else -value)
+        
+        frontier = self._frontier
+        if frontier is None:
+            return
+        
+        # Neighbours only stay in the frontier while another owned property touches them
+        owned_neighbours = 0
+        for neighbor_id in self._neighbours(place_id):
+            if neighbor_id in self.assets:
+                owned_neighbours += 1
+            elif neighbor_id in frontier:
+                frontier[neighbor_id] -= 1
+                if frontier[neighbor_id] == 0:
+                    del frontier[neighbor_id]
+        
+        # The sold place is an opportunity again if it touches the remaining portfolio
+        if owned_neighbours:
+            frontier[place_id] = owned_neighbours
+    
+    def reset_assets(self, assets):
+        
+        # Replace the whole portfolio, the frontier and value are rebuilt on next use
+        self.assets = set(assets)
+        self._frontier = None
+        self._portfolio_value = None
+    
+    def _revalue(self, change):
+        
+        if self._portfolio_value is not None:
+            self._portfolio_value = None if change is None else self._portfolio_value + change
+    
+    def _neighbours(self, place_id):
+        
+        return self.city.get_neighbours(place_id)
     
     def __str__(self):
         return f"Host(id={self.host_id}, area={self.area}, assets={len(self.assets)}, profits={self.profits:.2f})"
@@ -0,0 +1,290 @@
+import glob
+import hashlib
+import json
+import math
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+
+# Columns used by the Part 2 analysis (Inside Airbnb listings.csv / listings.csv.gz)
+LISTING_COLUMNS = [
+    'id', 'host_id', 'host_total_listings_count', 'neighbourhood_cleansed',
+    'room_type', 'price', 'number_of_reviews',
+]
+
+# dtypes used while parsing; host_id and number_of_reviews can be missing in the
+# raw dumps so they are read as floats and narrowed by clean_listings().
+# Listing and host ids exceed int32 and stay 64-bit.
+READ_DTYPES = {
+    'id': 'int64',
+    'host_id': 'float64',
+    'host_name': 'object',
+    'host_total_listings_count': 'float32',
+    'neighbourhood_cleansed': 'category',
+    'room_type': 'category',
+    'price': 'object',
+    'number_of_reviews': 'float32',
+}
+
+CATEGORY_COLUMNS = ['neighbourhood_cleansed', 'room_type', 'city']
+
+
+def parse_price(prices):
+
+    # '$1,234.00' -> 1234.0 in one vectorized pass; unparseable values become NaN
+    if pd.api.types.is_numeric_dtype(prices):
+        return prices.astype('float32')
+    cleaned = prices.str.replace(r'[$,]', '', regex=True)
+    return pd.to_numeric(cleaned, errors='coerce').astype('float32')
+
+
+def clean_listings(df, city_name=None):
+
+    # Same rules as clean_data in the Part 2 notebook, on compact dtypes
+    df = df.dropna(subset=['host_id'])
+    df = df.assign(host_id=df['host_id'].astype('int64'))
+
+    if 'price' in df.columns:
+        df = df.assign(price=parse_price(df['price']))
+
+    # Missing host_total_listings_count -> 1 (at least this listing)
+    if 'host_total_listings_count' in df.columns:
+        df = df.assign(host_total_listings_count=df['host_total_listings_count'].fillna(1).astype('int32'))
+
+    if 'number_of_reviews' in df.columns:
+        df = df.assign(number_of_reviews=df['number_of_reviews'].fillna(0).astype('int32'))
+
+    if city_name is not None:
+        df = df.assign(city=pd.Categorical([city_name] * len(df)))
+
+    return df.reset_index(drop=True)
+
+
+def _read_options(columns):
+
+    columns = list(columns or LISTING_COLUMNS)
+    dtypes = {column: READ_DTYPES[column] for column in columns if column in READ_DTYPES}
+    # .csv.gz is decompressed on the fly (compression inferred from the extension)
+    return {'usecols': columns, 'dtype': dtypes, 'compression': 'infer'}
+
+
+def iter_listings(path, city_name=None, columns=None, chunksize=100_000):
+
+    # Stream a listings file as cleaned chunks of at most chunksize rows
+    reader = pd.read_csv(path, chunksize=chunksize, **_read_options(columns))
+    with reader:
+        for chunk in reader:
+            yield clean_listings(chunk, city_name)
+
+
+def _concat(frames):
+
+    # Chunks carry different categories; concat falls back to object, so re-categorize
+    df = pd.concat(frames, ignore_index=True)
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+    return df
+
+
+def read_listings(path, city_name=None, columns=None, chunksize=None):
+
+    # Load one listings file (csv or csv.gz) with only the needed columns.
+    # chunksize bounds the memory used while parsing very large dumps.
+    if chunksize is None:
+        df = pd.read_csv(path, **_read_options(columns))
+        return clean_listings(df, city_name)
+
+    return _concat(list(iter_listings(path, city_name, columns, chunksize)))
+
+
+def read_cities(paths, columns=None, chunksize=None):
+
+    # paths maps a city (or city/month label) to its listings file;
+    # the result is one frame with a categorical 'city' column
+    frames = [read_listings(path, city_name, columns, chunksize) for city_name, path in paths.items()]
+    return _concat(frames)
+
+
+def listings_to_grid(listings, size=None, rng=None):
+
+    # Lay a cleaned listings table out on a size x size grid for City.from_listings.
+    # Listings without a neighbourhood or a usable price are dropped; if there are
+    # more listings than cells (default size = floor(sqrt(n))) a random subset is kept.
+    rng = np.random.default_rng(rng)
+
+    df = listings[['host_id', 'neighbourhood_cleansed', 'price']]
+    df = df.dropna(subset=['neighbourhood_cleansed'])
+
+    # Missing prices take the neighbourhood median
+    price = df['price'].astype('float64')
+    median = price.groupby(df['neighbourhood_cleansed'], observed=True).transform('median')
+    df = df.assign(price=price.fillna(median))
+    df = df[df['price'] > 0]
+
+    num_listings = len(df)
+    if size is None:
+        size = math.isqrt(num_listings)
+    num_places = size * size
+    if num_places == 0 or num_places > num_listings:
+        raise ValueError(f"{num_listings} usable listings cannot fill a {size}x{size} grid")
+    keep = np.sort(rng.choice(num_listings, num_places, replace=False))
+    df = df.iloc[keep]
+
+    # Neighbourhood codes are the areas
+    neighbourhoods = df['neighbourhood_cleansed'].astype(str).astype('category')
+    area = neighbourhoods.cat.codes.to_numpy()
+    rate = df['price'].to_numpy(dtype=np.float64)
+    host = df['host_id'].to_numpy(dtype=np.int64)
+
+    # Row-major placement sorted by neighbourhood then host keeps areas contiguous
+    # and puts a host's listings next to each other
+    order = np.lexsort((host, area))
+    area, rate, host = area[order], rate[order], host[order]
+
+    # owner indexes host_ids; a host's area is the area of its first place
+    host_ids, owner = np.unique(host, return_inverse=True)
+    _, first_place = np.unique(owner, return_index=True)
+    host_area = area[first_place]
+
+    # Rate interval per area centred on the observed mean, so get_area_mean_rate
+    # returns the neighbourhood's mean nightly price. Prices are heavy-tailed
+    # (std often exceeds the mean), so the half-width is capped at the mean to
+    # keep the interval non-negative without moving its midpoint.
+    area_rates = {}
+    for code in range(len(neighbourhoods.cat.categories)):
+        rates = rate[area == code]
+        if len(rates):
+            mean = rates.mean()
+            half_width = min(rates.std(), mean)
+            area_rates[code] = (float(mean - half_width), float(mean + half_width))
+
+    return {
+        'size': size,
+        'rate': rate,
+        'area': area,
+        'owner': owner,
+        'host_ids': host_ids,
+        'host_area': host_area,
+        'area_rates': area_rates,
+        'area_names': list(neighbourhoods.cat.categories),
+    }
+
+
+# Bump whenever clean_listings/parse_price change what ends up in the cache
+CLEANING_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join('data', 'cache')
+
+
+def file_digest(path, block_size=1 << 20):
+
+    # SHA-256 of the raw source file, read in blocks
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_digest(path, cache_dir):
+
+    # Hashing a large dump takes longer than loading the cache, so the digest is
+    # remembered per (path, size, mtime) and only recomputed when those change
+    manifest_path = os.path.join(cache_dir, 'sources.json')
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    entry = manifest.get(key)
+    if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+        return entry['sha256']
+
+    digest = file_digest(path)
+    manifest[key] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': digest}
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return digest
+
+
+def save_columns(df, directory):
+
+    # One .npy file per column (categoricals as codes + categories) plus a JSON
+    # description, written to a temporary directory and moved into place
+    tmp = directory + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    meta = {'columns': [], 'rows': len(df)}
+    for i, column in enumerate(df.columns):
+        values = df[column]
+        if values.dtype == object:
+            values = values.astype('category')
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            np.save(os.path.join(tmp, f'{i}.codes.npy'), values.cat.codes.to_numpy())
+            np.save(os.path.join(tmp, f'{i}.categories.npy'), values.cat.categories.to_numpy().astype(str))
+            meta['columns'].append({'name': column, 'kind': 'category'})
+        else:
+            np.save(os.path.join(tmp, f'{i}.npy'), values.to_numpy())
+            meta['columns'].append({'name': column, 'kind': 'array'})
+
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp, directory)
+
+
+def load_columns(directory, mmap=True):
+
+    # Numeric columns are memory-mapped, so loading does not read the data itself
+    with open(os.path.join(directory, 'meta.json')) as f:
+        meta = json.load(f)
+
+    mmap_mode = 'r' if mmap else None
+    data = {}
+    for i, column in enumerate(meta['columns']):
+        if column['kind'] == 'category':
+            codes = np.load(os.path.join(directory, f'{i}.codes.npy'))
+            categories = np.load(os.path.join(directory, f'{i}.categories.npy'))
+            data[column['name']] = pd.Categorical.from_codes(codes, categories)
+        else:
+            data[column['name']] = np.load(os.path.join(directory, f'{i}.npy'), mmap_mode=mmap_mode)
+
+    return pd.DataFrame(data, copy=False)
+
+
+def load_cached_listings(path, city_name=None, columns=None, cache_dir=DEFAULT_CACHE_DIR, chunksize=None):
+
+    # read_listings() with a columnar cache: the cleaned table is stored under
+    # cache_dir keyed by source hash, cleaning version, columns and city name,
+    # and only rebuilt when one of those changes
+    os.makedirs(cache_dir, exist_ok=True)
+
+    columns = list(columns or LISTING_COLUMNS)
+    options = json.dumps({'columns': columns, 'city': city_name}, sort_keys=True)
+    options_digest = hashlib.sha256(options.encode()).hexdigest()[:8]
+    source_digest = _source_digest(path, cache_dir)
+
+    # Inside Airbnb dumps all share the name listings.csv.gz, so the entry name
+    # also carries a digest of the absolute path to keep cities apart
+    name = os.path.basename(path).split('.')[0]
+    path_digest = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:8]
+    prefix = f'{name}-{path_digest}'
+    entry = os.path.join(cache_dir, f'{prefix}-{source_digest[:16]}-v{CLEANING_VERSION}-{options_digest}')
+
+    if not os.path.exists(os.path.join(entry, 'meta.json')):
+        # Drop tables built from an older version of the same source file
+        for stale in glob.glob(os.path.join(cache_dir, f'{prefix}-*-{options_digest}')):
+            shutil.rmtree(stale, ignore_errors=True)
+
+        df = read_listings(path, city_name, columns, chunksize)
+        save_columns(df, entry)
+
+    return load_columns(entry)
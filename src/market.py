@@ -0,0 +1,50 @@
+import numpy as np
+
+
+# Sort kinds accepted by match_bids:
+#   'quicksort' - same order as the previous pandas sort_values(ascending=False),
+#                 ties between equal spreads are broken by NumPy's (unstable) quicksort
+#   'stable'    - ties between equal spreads keep the order the bids were submitted in
+SORT_KINDS = ('quicksort', 'stable')
+
+
+def sort_bids(spread, kind='quicksort'):
+
+    if kind not in SORT_KINDS:
+        raise ValueError(f"Unknown sort kind: {kind!r} (expected one of {SORT_KINDS})")
+
+    spread = np.asarray(spread, dtype=np.float64)
+
+    # Descending sort done the way pandas does it (reverse, ascending argsort, reverse)
+    # so that 'quicksort' reproduces the DataFrame path tie for tie
+    reversed_idx = np.arange(len(spread) - 1, -1, -1)
+    order = reversed_idx[spread[::-1].argsort(kind=kind)]
+
+    return order[::-1]
+
+
+def match_bids(buyer_ids, place_ids, spread, kind='quicksort'):
+
+    # Greedy matching: walk the bids from highest to lowest spread and approve
+    # a bid if neither its buyer nor its place has been matched yet
+    order = sort_bids(spread, kind=kind)
+
+    buyer_ids = np.asarray(buyer_ids)
+    place_ids = np.asarray(place_ids)
+
+    # No more matches are possible once every distinct buyer or place is used
+    max_matches = min(len(np.unique(buyer_ids)), len(np.unique(place_ids)))
+
+    approved = []
+    buyers_used = set()
+    places_sold = set()
+
+    for i, buyer_id, place_id in zip(order.tolist(), buyer_ids[order].tolist(), place_ids[order].tolist()):
+        if buyer_id not in buyers_used and place_id not in places_sold:
+            approved.append(i)
+            buyers_used.add(buyer_id)
+            places_sold.add(place_id)
+            if len(approved) == max_matches:
+                break
+
+    return np.array(approved, dtype=np.int64)
@@ -1,7 +1,100 @@
-import random
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+
+class PriceHistory:
+    
+    __slots__ = ('steps', 'prices', 'latest', 'max')
+    
+    def __init__(self, step=None, price=None):
+        
+        # Append-only (step, price) records stored as compact typed arrays
+        self.steps = array('q')
+        self.prices = array('d')
+        
+        # Cached in O(1): most recent price and highest price ever recorded
+        self.latest = None
+        self.max = None
+        
+        if step is not None:
+            self.append(step, price)
+    
+    @classmethod
+    def from_arrays(cls, steps, prices):
+        
+        history = cls()
+        history.steps = array('q', steps)
+        history.prices = array('d', prices)
+        if len(history.prices):
+            history.latest = history.prices[-1]
+            history.max = max(history.prices)
+        return history
+    
+    def append(self, step, price):
+        
+        if self.steps and step < self.steps[-1]:
+            raise ValueError(f"Price history is append-only: step {step} < {self.steps[-1]}")
+        
+        if self.steps and step == self.steps[-1]:
+            # Same step recorded twice: the new price replaces the last entry
+            self.prices[-1] = price
+            self.max = max(self.prices)
+        else:
+            self.steps.append(step)
+            self.prices.append(price)
+            if self.max is None or price > self.max:
+                self.max = price
+        
+        self.latest = price
+    
+    def at(self, step):
+        
+        # Price in effect at a given step (last record at or before it)
+        i = bisect_left(self.steps, step + 1) - 1
+        return self.prices[i] if i >= 0 else None
+    
+    # Dict-like access, so code written against the old {step: price} dict keeps working
+    
+    def __setitem__(self, step, price):
+        self.append(step, price)
+    
+    def __getitem__(self, step):
+        i = bisect_left(self.steps, step)
+        if i == len(self.steps) or self.steps[i] != step:
+            raise KeyError(step)
+        return self.prices[i]
+    
+    def __contains__(self, step):
+        i = bisect_left(self.steps, step)
+        return i < len(self.steps) and self.steps[i] == step
+    
+    def __len__(self):
+        return len(self.steps)
+    
+    def __iter__(self):
+        return iter(self.steps)
+    
+    def keys(self):
+        return list(self.steps)
+    
+    def values(self):
+        return list(self.prices)
+    
+    def items(self):
+        return list(zip(self.steps, self.prices))
+    
+    def __repr__(self):
+        return f"PriceHistory({dict(self.items())})"
+
 
 class Place:
     
+    # No per-instance __dict__ and no stored neighbour list: neighbours are
+    # derived from the grid position by the city when needed
+    __slots__ = ('place_id', 'host_id', 'city', 'area', 'rate', 'price', 'occupancy')
+    
     def __init__(self, place_id, host_id, city):
         
         # Initialize Args
@@ -10,43 +103,85 @@ class Place:
         self.city = city
         
         # Initialize attributes that will be set by setup()
-        self.neighbours = []
         self.area = None
         self.rate = None
-        self.price = {}
+        self.price = PriceHistory()
         self.occupancy = None
         
         # Call setup to initialize key attributes
         self.setup()
     
-    def setup(self):
+    @classmethod
+    def from_state(cls, place_id, host_id, city, area, rate, price, occupancy=None):
         
-        # Set neighbours (list of adjacent place_ids)
-        # This would typically be calculated based on grid position
-        # For now, initializing as empty list - would need city grid logic
-        self.neighbours = []
+        # Build a place from known state without running setup() (no random draws)
+        place = cls.__new__(cls)
+        place.place_id = place_id
+        place.host_id = host_id
+        place.city = city
+        place.area = area
+        place.rate = rate
+        place.price = price
+        place.occupancy = occupancy
+        return place
+    
+    def setup(self):
         
         # Set area (quadrant): 0=bottom-left, 1=bottom-right, 2=top-left, 3=top-right
         # This would be determined by the place's position in the city grid
         # For now, randomly assigning - would need actual grid position logic
-        self.area = random.randint(0, 3)
+        rng = self._rng()
+        self.area = int(rng.integers(0, 4))
         
         # Set rate: nightly price from the area's rate interval
         if hasattr(self.city, 'area_rates') and self.area in self.city.area_rates:
             rate_min, rate_max = self.city.area_rates[self.area]
-            self.rate = random.uniform(rate_min, rate_max)
+            self.rate = float(rng.uniform(rate_min, rate_max))
         else:
             # Default rate if city doesn't have area_rates defined
-            self.rate = random.uniform(50, 200)
+            self.rate = float(rng.uniform(50, 200))
         
-        # Initialize price dictionary with step 0
-        self.price = {0: 900 * self.rate}
+        # Initialize price history with step 0
+        self.price = PriceHistory(0, 900 * self.rate)
         
         # Initialize occupancy
         self.occupancy = None
     
-    def update_occupancy(self):
+    def _rng(self):
+        
+        # Random draws come from the city's own Generator, never the global state
+        if hasattr(self.city, 'rng'):
+            return self.city.rng
+        return np.random.default_rng()
+    
+    @property
+    def neighbours(self):
+        
+        # Adjacent place_ids (list), computed from the grid position by the city
+        if hasattr(self.city, 'get_neighbours'):
+            return self.city.get_neighbours(self.place_id)
+        return []
+    
+    @property
+    def ask_price(self):
         
+        # Current sale price: the highest price recorded so far
+        return self.price.max
+    
+    @property
+    def last_price(self):
+        
+        # Price of the most recent sale (or the initial price)
+        return self.price.latest
+    
+    def record_price(self, step, price):
+        
+        # Add a sale to the price history (ask and last price update in O(1))
+        self.price.append(step, price)
+    
+    def min_occupancy(self):
+        
+        # Lower bound of the monthly occupancy interval
         # Calculate mean rate for the area
         if hasattr(self.city, 'get_area_mean_rate'):
             area_mean_rate = self.city.get_area_mean_rate(self.area)
@@ -59,13 +194,25 @@ class Place:
                 # Default mean rate
                 area_mean_rate = 125
         
-        # Set occupancy based on rate comparison
         if self.rate > area_mean_rate:
             # Above average rate: lower occupancy (5-15 days)
-            self.occupancy = random.randint(5, 15)
-        else:
-            # Below or equal to average rate: higher occupancy (10-20 days)
-            self.occupancy = random.randint(10, 20)
+            return 5
+        # Below or equal to average rate: higher occupancy (10-20 days)
+        return 10
+    
+    def max_occupancy(self):
+        
+        # Upper bound of the monthly occupancy interval (draws go up to 10 days above)
+        return self.min_occupancy() + 10
+    
+    def update_occupancy(self, draw=None):
+        
+        # draw is the number of days above the interval's lower bound (0-10);
+        # City.iterate passes one from a single batched draw for all places
+        if draw is None:
+            draw = int(self._rng().integers(0, 11))
+        
+        self.occupancy = self.min_occupancy() + draw
     
     def __str__(self):
         return f"Place(id={self.place_id}, host={self.host_id}, area={self.area}, rate={self.rate:.2f})"
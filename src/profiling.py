@@ -0,0 +1,125 @@
+import cProfile
+import io
+import json
+import pstats
+import time
+import tracemalloc
+
+
+# Phases of City.iterate() in execution order
+PHASES = ('occupancy', 'profits', 'bids', 'approve', 'execute', 'schedule', 'record', 'log')
+
+
+class StepProfiler:
+    
+    def __init__(self, cprofile=False, trace_memory=False):
+        
+        # Per-phase wall time and call counts
+        self.phase_seconds = dict.fromkeys(PHASES, 0.0)
+        self.phase_calls = dict.fromkeys(PHASES, 0)
+        
+        # Market counters accumulated over all steps
+        self.counters = {'steps': 0, 'active_hosts': 0, 'bids': 0, 'approved': 0, 'executed': 0}
+        
+        # Optional whole-run captures
+        self.cprofile = cprofile
+        self.trace_memory = trace_memory
+        self._profile = None
+        self._started = None
+        self.wall_seconds = 0.0
+        self.peak_memory = None
+        self.cprofile_stats = None
+    
+    def time(self, name, func, *args):
+        
+        start = time.perf_counter()
+        result = func(*args)
+        self.phase_seconds[name] += time.perf_counter() - start
+        self.phase_calls[name] += 1
+        return result
+    
+    def count_market(self, bids, approved, executed, active_hosts):
+        
+        # active_hosts = hosts asked for bids (all of them without a scheduler)
+        self.counters['steps'] += 1
+        self.counters['active_hosts'] += active_hosts
+        self.counters['bids'] += bids
+        self.counters['approved'] += approved
+        self.counters['executed'] += executed
+    
+    def start(self):
+        
+        if self.trace_memory:
+            tracemalloc.start()
+        if self.cprofile:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._started = time.perf_counter()
+    
+    def stop(self):
+        
+        self.wall_seconds += time.perf_counter() - self._started
+        if self._profile is not None:
+            self._profile.disable()
+            out = io.StringIO()
+            pstats.Stats(self._profile, stream=out).sort_stats('cumulative').print_stats(25)
+            self.cprofile_stats = out.getvalue()
+            self._profile = None
+        if self.trace_memory:
+            _, self.peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    
+    def __enter__(self):
+        self.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.stop()
+    
+    def report(self):
+        
+        # Machine-readable summary (JSON serializable)
+        timed = sum(self.phase_seconds.values())
+        phases = {}
+        for name in PHASES:
+            calls = self.phase_calls[name]
+            if calls == 0:
+                continue
+            seconds = self.phase_seconds[name]
+            phases[name] = {
+                'seconds': seconds,
+                'calls': calls,
+                'mean_ms': 1000 * seconds / calls,
+                'share': seconds / timed if timed else 0.0,
+            }
+        
+        return {
+            'wall_seconds': self.wall_seconds,
+            'phases': phases,
+            'counters': dict(self.counters),
+            'peak_memory_bytes': self.peak_memory,
+            'cprofile': self.cprofile_stats,
+        }
+    
+    def table(self):
+        
+        # Human-readable per-phase breakdown
+        report = self.report()
+        lines = [f"{'phase':<10} {'total (s)':>10} {'calls':>7} {'mean (ms)':>10} {'share':>7}"]
+        for name, phase in report['phases'].items():
+            lines.append(f"{name:<10} {phase['seconds']:>10.4f} {phase['calls']:>7} "
+                         f"{phase['mean_ms']:>10.3f} {phase['share']:>6.1%}")
+        lines.append(f"wall time: {report['wall_seconds']:.4f} s")
+        counters = report['counters']
+        lines.append(f"active hosts: {counters['active_hosts']:,}  bids: {counters['bids']:,}  approved: {counters['approved']:,}  "
+                     f"executed: {counters['executed']:,}  steps: {counters['steps']:,}")
+        if report['peak_memory_bytes'] is not None:
+            lines.append(f"peak traced memory: {report['peak_memory_bytes'] / 1e6:.1f} MB")
+        if report['cprofile'] is not None:
+            lines.append(report['cprofile'])
+        return "\n".join(lines)
+    
+    def save_json(self, path):
+        
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
@@ -0,0 +1,159 @@
+import glob
+import os
+
+import numpy as np
+from .analytics import concentration, city_wealth, city_asset_counts
+
+
+TRANSACTION_DTYPE = np.dtype([
+    ('step', np.int32),
+    ('place_id', np.int64),
+    ('seller_id', np.int64),
+    ('buyer_id', np.int64),
+    ('bid_price', np.float64),
+    ('spread', np.float64),
+])
+
+STEP_DTYPE = np.dtype([
+    ('step', np.int32),
+    ('transactions', np.int32),
+    ('volume', np.float64),
+    ('mean_wealth', np.float64),
+    ('median_wealth', np.float64),
+    ('gini', np.float64),
+    ('top_decile_share', np.float64),
+    ('max_places', np.int32),
+    ('owning_hosts', np.int32),
+])
+
+
+def transaction_records(step, transactions):
+    
+    # Executed transactions of one step (dicts from City.iterate) as TRANSACTION_DTYPE rows
+    return np.array([
+        (step, t['place_id'], t['seller_id'], t['buyer_id'], t['bid_price'], t['spread'])
+        for t in transactions
+    ], dtype=TRANSACTION_DTYPE)
+
+
+class RecordBuffer:
+    
+    def __init__(self, dtype, capacity, directory=None, name=None):
+        
+        # Preallocated block of structured records
+        self.dtype = dtype
+        self.capacity = capacity
+        self.data = np.empty(capacity, dtype=dtype)
+        self.count = 0
+        
+        # With a directory full blocks are flushed to numbered .npy chunks,
+        # without one the buffer is a ring that keeps the latest `capacity` rows
+        self.directory = directory
+        self.name = name
+        self.chunks = 0
+        self.total = 0
+    
+    def append(self, records):
+        
+        records = np.asarray(records, dtype=self.dtype)
+        while len(records):
+            position = self.count % self.capacity
+            n = min(len(records), self.capacity - position)
+            self.data[position:position + n] = records[:n]
+            self.count += n
+            self.total += n
+            records = records[n:]
+            
+            if self.directory is not None and self.count == self.capacity:
+                self.flush()
+    
+    def flush(self):
+        
+        if self.directory is None or self.count == 0:
+            return
+        path = os.path.join(self.directory, f"{self.name}_{self.chunks:06d}.npy")
+        np.save(path, self.data[:self.count])
+        self.chunks += 1
+        self.count = 0
+    
+    def latest(self):
+        
+        # Rows still held in memory, oldest first
+        if self.count <= self.capacity:
+            return self.data[:self.count].copy()
+        position = self.count % self.capacity
+        return np.concatenate((self.data[position:], self.data[:position]))
+
+
+class MetricsRecorder:
+    
+    def __init__(self, directory=None, capacity=4096, summary_every=1):
+        
+        # directory=None keeps bounded ring buffers in memory, otherwise records
+        # are streamed to .npy chunks under directory as the buffers fill up
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        
+        self.directory = directory
+        self.summary_every = summary_every
+        self.transactions = RecordBuffer(TRANSACTION_DTYPE, capacity, directory, 'transactions')
+        self.steps = RecordBuffer(STEP_DTYPE, capacity, directory, 'steps')
+    
+    def record(self, city, transactions):
+        
+        # Called by City.iterate() after every step
+        step = city.step
+        if transactions:
+            self.transactions.append(transaction_records(step, transactions))
+        
+        if step % self.summary_every == 0:
+            wealth = city_wealth(city)
+            places = city_asset_counts(city)
+            volume = sum(t['bid_price'] for t in transactions)
+            metrics = concentration(wealth)
+            self.steps.append([(
+                step, len(transactions), volume,
+                wealth.mean(), np.median(wealth), metrics['gini'], metrics['top_10pct_share'],
+                places.max(), np.count_nonzero(places),
+            )])
+    
+    def flush(self):
+        
+        self.transactions.flush()
+        self.steps.flush()
+    
+    def close(self):
+        
+        self.flush()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def step_table(self):
+        
+        # Everything recorded so far (from disk when streaming, else the ring buffer)
+        return self._table(self.steps)
+    
+    def transaction_table(self):
+        
+        return self._table(self.transactions)
+    
+    def _table(self, buffer):
+        
+        if self.directory is None:
+            return buffer.latest()
+        buffer.flush()
+        return load_records(self.directory, buffer.name)
+
+
+def load_records(directory, name):
+    
+    # Concatenate the .npy chunks written by a MetricsRecorder ('steps' or 'transactions')
+    paths = sorted(glob.glob(os.path.join(directory, f"{name}_*.npy")))
+    dtype = STEP_DTYPE if name == 'steps' else TRANSACTION_DTYPE
+    if not paths:
+        return np.empty(0, dtype=dtype)
+    return np.concatenate([np.load(path) for path in paths])
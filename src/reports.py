@@ -0,0 +1,244 @@
+import csv
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+
+from .analytics import city_wealth, city_host_areas, city_host_ids
+
+
+# Colours of the four simulated areas; further areas (real listings) cycle through tab20
+AREA_COLORS = {0: '#E74C3C', 1: '#3498DB', 2: '#2ECC71', 3: '#F39C12'}
+FALLBACK_COLORS = [
+    '#1f77b4', '#aec7e8', '#ff7f0e', '#ffbb78', '#2ca02c', '#98df8a', '#d62728', '#ff9896',
+    '#9467bd', '#c5b0d5', '#8c564b', '#c49c94', '#e377c2', '#f7b6d2', '#7f7f7f', '#c7c7c7',
+    '#bcbd22', '#dbdb8d', '#17becf', '#9edae5',
+]
+
+# Output formats: rasters take dpi into account, svg/pdf are vector, csv writes
+# the summary arrays behind the figure instead of drawing it
+FORMATS = ('png', 'svg', 'pdf', 'csv')
+
+# Bump whenever a renderer changes what ends up in the files, so that
+# render_reports() does not skip figures drawn by the old code
+RENDER_VERSION = 1
+
+MANIFEST_NAME = '.render_manifest.json'
+
+
+def area_color(area):
+    return AREA_COLORS.get(area, FALLBACK_COLORS[area % len(FALLBACK_COLORS)])
+
+
+def wealth_summary(city):
+
+    # Per-host wealth, area and id as plain arrays sorted by wealth (smallest to
+    # largest); this is everything the figures need, so it is cheap to send to
+    # worker processes and to hash
+    wealth = city_wealth(city)
+    area = np.asarray(city_host_areas(city), dtype=np.int64)
+    host_id = city_host_ids(city)
+
+    order = np.argsort(wealth, kind='stable')
+    return {'host_id': host_id[order], 'wealth': wealth[order], 'area': area[order]}
+
+
+def area_statistics(summary):
+
+    # Mean, median, standard deviation and host count of wealth per area
+    stats = {}
+    wealth, area = summary['wealth'], summary['area']
+    for code in np.unique(area).tolist():
+        in_area = wealth[area == code]
+        stats[code] = {
+            'mean': float(in_area.mean()),
+            'median': float(np.median(in_area)),
+            'std': float(in_area.std()),
+            'count': len(in_area),
+        }
+    return stats
+
+
+def _new_figure(figsize):
+
+    # A Figure with its own Agg canvas: nothing is registered with pyplot, so
+    # figures can be drawn from any thread or process and are freed with the object
+    figure = Figure(figsize=figsize)
+    FigureCanvasAgg(figure)
+    return figure
+
+
+def render_wealth_chart(summary, filename, dpi=300):
+
+    # Vertical bar chart, one bar per host sorted by wealth, coloured by area of origin
+    wealth, area = summary['wealth'], summary['area']
+    colors = [area_color(code) for code in area.tolist()]
+
+    figure = _new_figure((14, 6))
+    ax = figure.add_subplot()
+    ax.bar(np.arange(len(wealth)), wealth, color=colors, edgecolor='black', linewidth=0.5)
+
+    ax.set_xlabel('Host (sorted by wealth)', fontsize=12)
+    ax.set_ylabel('Total Wealth ($)', fontsize=12)
+    ax.set_title('Host Wealth Distribution by Area of Origin', fontsize=14, fontweight='bold')
+
+    legend_elements = [Rectangle((0, 0), 1, 1, facecolor=area_color(code), edgecolor='black',
+                                 label=f'Area {code}') for code in np.unique(area).tolist()]
+    ax.legend(handles=legend_elements, loc='upper left', fontsize=11)
+
+    ax.grid(True, alpha=0.3, axis='y')
+    figure.tight_layout()
+    figure.savefig(filename, dpi=dpi, bbox_inches='tight')
+
+
+def render_area_comparison(summary, filename, dpi=300):
+
+    # Average wealth per area (bars) next to the wealth distribution per area (box plots)
+    stats = area_statistics(summary)
+    areas = list(stats)
+    colors = [area_color(code) for code in areas]
+
+    figure = _new_figure((15, 6))
+    ax1, ax2 = figure.subplots(1, 2)
+
+    means = [stats[code]['mean'] for code in areas]
+    ax1.bar(areas, means, color=colors, edgecolor='black', linewidth=1.5)
+    ax1.set_xlabel('Area', fontsize=12)
+    ax1.set_ylabel('Average Wealth ($)', fontsize=12)
+    ax1.set_title('Average Wealth by Area', fontsize=13, fontweight='bold')
+    ax1.set_xticks(areas)
+    ax1.grid(True, alpha=0.3, axis='y')
+
+    # Tick labels are set on the axis: boxplot(labels=...) was renamed in
+    # matplotlib 3.9 and is rejected by newer releases
+    wealth_by_area = [summary['wealth'][summary['area'] == code] for code in areas]
+    bp = ax2.boxplot(wealth_by_area, patch_artist=True, widths=0.6)
+    ax2.set_xticks(np.arange(1, len(areas) + 1))
+    ax2.set_xticklabels([f'Area {code}' for code in areas])
+
+    for patch, color in zip(bp['boxes'], colors):
+        patch.set_facecolor(color)
+        patch.set_alpha(0.7)
+        patch.set_edgecolor('black')
+
+    ax2.set_xlabel('Area', fontsize=12)
+    ax2.set_ylabel('Wealth Distribution ($)', fontsize=12)
+    ax2.set_title('Wealth Distribution by Area', fontsize=13, fontweight='bold')
+    ax2.grid(True, alpha=0.3, axis='y')
+
+    figure.tight_layout()
+    figure.savefig(filename, dpi=dpi, bbox_inches='tight')
+
+
+def write_summary_csv(summary, filename):
+
+    # The arrays behind a figure, one row per host
+    columns = list(summary)
+    with open(filename, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(zip(*(summary[column].tolist() for column in columns)))
+
+
+RENDERERS = {
+    'wealth': render_wealth_chart,
+    'area_comparison': render_area_comparison,
+}
+
+
+def output_paths(filename, formats):
+
+    # reports/graph1.png with formats ('png', 'csv') -> reports/graph1.png, reports/graph1.csv
+    base, _ = os.path.splitext(filename)
+    return {fmt: f'{base}.{fmt}' for fmt in formats}
+
+
+def render_job(job):
+
+    # Worker entry point: draw one figure in every requested format.
+    # job = {'kind', 'summary', 'filename', 'formats', 'dpi'}
+    written = []
+    for fmt, path in output_paths(job['filename'], job['formats']).items():
+        if fmt == 'csv':
+            write_summary_csv(job['summary'], path)
+        else:
+            RENDERERS[job['kind']](job['summary'], path, dpi=job['dpi'])
+        written.append(path)
+    return written
+
+
+def job_digest(job):
+
+    # Hash of everything that determines the output files
+    digest = hashlib.sha256()
+    options = {'kind': job['kind'], 'dpi': job['dpi'], 'version': RENDER_VERSION}
+    digest.update(json.dumps(options, sort_keys=True).encode())
+    for name in sorted(job['summary']):
+        values = np.ascontiguousarray(job['summary'][name])
+        digest.update(name.encode())
+        digest.update(values.dtype.str.encode())
+        digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+def _load_manifest(path):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def render_reports(jobs, formats=('png',), dpi=300, workers=None, force=False):
+
+    # Render every job across a process pool and return {output path: 'rendered' | 'skipped'}.
+    # jobs is a list of {'kind': one of RENDERERS, 'summary': arrays, 'filename': path}.
+    # An output is skipped when the file exists and its input digest matches the one
+    # recorded in the .render_manifest.json of its directory (force=True redraws all).
+    for fmt in formats:
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown report format: {fmt!r} (expected one of {FORMATS})")
+
+    manifests = {}
+    status = {}
+    pending = []
+    for job in jobs:
+        job = dict(job, formats=tuple(formats), dpi=dpi)
+        directory = os.path.dirname(job['filename']) or '.'
+        os.makedirs(directory, exist_ok=True)
+        manifest = manifests.setdefault(directory, _load_manifest(os.path.join(directory, MANIFEST_NAME)))
+
+        digest = job_digest(job)
+        stale = []
+        for fmt, path in output_paths(job['filename'], formats).items():
+            key = os.path.basename(path)
+            if not force and manifest.get(key) == digest and os.path.exists(path):
+                status[path] = 'skipped'
+            else:
+                stale.append(fmt)
+                manifest[key] = digest
+        if stale:
+            pending.append(dict(job, formats=tuple(stale)))
+
+    if len(pending) == 1 or workers == 1:
+        results = [render_job(job) for job in pending]
+    elif pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(render_job, pending))
+    else:
+        results = []
+
+    for written in results:
+        for path in written:
+            status[path] = 'rendered'
+
+    # Manifests are only written once every figure has been saved
+    for directory, manifest in manifests.items():
+        with open(os.path.join(directory, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+
+    return status
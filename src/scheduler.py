@@ -0,0 +1,58 @@
+import numpy as np
+
+
+class ActiveSet:
+
+    # Sparse bidding: a host can only bid once its profits cover the cheapest
+    # ask on its frontier. Profits grow by at most the host's maximum monthly
+    # income (every place at its highest occupancy) and asks never go down, so
+    # the earliest step at which that can happen is known in advance. Hosts are
+    # only asked for bids from that step on; hosts that bought or sold (new
+    # frontier, new income, new profits) are rescheduled for the next step.
+    #
+    # The schedule never wakes a host too late, so the bids produced are exactly the ones
+    # a full evaluation would produce. Attach with city.scheduler = ActiveSet().
+
+    def __init__(self):
+
+        # wake[i] = first step at which host i (position in the host arrays) is
+        # evaluated again; inf = never, until it takes part in a transaction
+        self.wake = np.zeros(0, dtype=np.float64)
+
+    def active(self, step, num_hosts):
+
+        # Indices of the hosts to evaluate at this step. A changed host count
+        # (add_host/remove_host shift the indices) makes every host active again.
+        if len(self.wake) != num_hosts:
+            self.wake = np.zeros(num_hosts, dtype=np.float64)
+        return np.flatnonzero(self.wake <= step)
+
+    def reschedule(self, step, hosts, profits, min_ask, max_income):
+
+        # Next evaluation of each host in hosts: next step if it can already
+        # afford its cheapest opportunity, otherwise after the number of steps
+        # its maximum income needs to cover the deficit
+        deficit = min_ask - profits
+        with np.errstate(divide='ignore', invalid='ignore'):
+            steps = np.ceil(deficit / max_income)
+        steps = np.where(deficit <= 0, 1, steps)
+        # No income or an empty frontier -> wait for a transaction
+        steps = np.where(np.isnan(steps), np.inf, steps)
+        self.wake[hosts] = step + steps
+
+    def touch(self, hosts, step):
+
+        # Hosts whose portfolio or profits changed outside the schedule
+        self.wake[hosts] = step + 1
+
+    def wake_all(self):
+
+        self.wake[:] = 0
+
+
+def min_ask_per_host(opportunities, num_hosts):
+
+    # Cheapest ask on each host's frontier (inf for hosts without opportunities)
+    min_ask = np.full(num_hosts, np.inf)
+    np.minimum.at(min_ask, opportunities.buyer, opportunities.ask)
+    return min_ask
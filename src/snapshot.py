@@ -0,0 +1,240 @@
+import json
+
+import numpy as np
+from .place import Place, PriceHistory
+from .hosts import Host
+
+
+# Bumped whenever the snapshot layout changes
+SNAPSHOT_VERSION = 1
+
+
+def snapshot_city(city):
+    
+    # Array engines are read from their arrays without syncing the objects
+    engine = city._array_engine
+    if engine is not None:
+        arrays = _engine_arrays(engine)
+    else:
+        arrays = _object_arrays(city.places, city.hosts)
+    
+    # Scalars and dicts are stored as JSON strings so no pickling is needed on load
+    meta = {
+        'version': SNAPSHOT_VERSION,
+        'size': city.size,
+        'area_rates': {str(area): list(rates) for area, rates in city.area_rates.items()},
+        'area_names': city.area_names,
+        'engine': city.engine,
+        'step': city.step,
+        'same_area_rule': bool(city.same_area_rule),
+        'bid_sort_kind': city.bid_sort_kind,
+        'rng_state': city.rng.bit_generator.state,
+    }
+    
+    return {'meta': np.array(json.dumps(meta)), **arrays}
+
+
+def _object_arrays(places, hosts):
+    
+    price_offsets, price_steps, price_values = _history_columns(places)
+    
+    return {
+        'place_id': np.array([place.place_id for place in places], dtype=np.int64),
+        'place_host_id': np.array([place.host_id for place in places], dtype=np.int64),
+        'place_area': np.array([place.area for place in places], dtype=np.int16),
+        'place_rate': np.array([place.rate for place in places], dtype=np.float64),
+        'place_occupancy': np.array([-1 if place.occupancy is None else place.occupancy for place in places], dtype=np.int16),
+        'price_offsets': price_offsets,
+        'price_steps': price_steps,
+        'price_values': price_values,
+        'host_id': np.array([host.host_id for host in hosts], dtype=np.int64),
+        'host_area': np.array([host.area for host in hosts], dtype=np.int16),
+        'host_profits': np.array([host.profits for host in hosts], dtype=np.float64),
+    }
+
+
+def _history_columns(places):
+    
+    # Price histories are flattened into one steps/prices pair plus offsets;
+    # the typed arrays of every history are copied as raw bytes
+    histories = [place.price for place in places]
+    lengths = np.fromiter((len(history.steps) for history in histories), dtype=np.int64, count=len(histories))
+    price_offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+    price_steps = np.frombuffer(b''.join([history.steps.tobytes() for history in histories]), dtype=np.int64)
+    price_values = np.frombuffer(b''.join([history.prices.tobytes() for history in histories]), dtype=np.float64)
+    return price_offsets, price_steps.copy(), price_values.copy()
+
+
+def _engine_arrays(engine):
+    
+    # Same layout from the array engine. Once the objects exist they carry the
+    # price histories (the engine records sales on them directly); before that
+    # every history is the initial price at step 0 followed by the place's
+    # entries of the pending price log.
+    num_places = len(engine.rate)
+    if engine.price_log is None:
+        price_offsets, price_steps, price_values = _history_columns(engine.city._places)
+    else:
+        price_offsets, price_steps, price_values = _log_columns(engine)
+    
+    return {
+        'place_id': np.arange(num_places, dtype=np.int64),
+        'place_host_id': engine.host_ids[engine.owner],
+        'place_area': engine.area.astype(np.int16),
+        'place_rate': engine.rate.copy(),
+        'place_occupancy': engine.occupancy.astype(np.int16),
+        'price_offsets': price_offsets,
+        'price_steps': price_steps,
+        'price_values': price_values,
+        'host_id': engine.host_ids.copy(),
+        'host_area': engine.host_area.astype(np.int16),
+        'host_profits': engine.profits.copy(),
+    }
+
+
+def _log_columns(engine):
+    
+    num_places = len(engine.rate)
+    log_place = log_step = np.zeros(0, dtype=np.int64)
+    log_price = np.zeros(0, dtype=np.float64)
+    if engine.price_log:
+        log_place, log_step, log_price = (np.array(column) for column in zip(*engine.price_log))
+    
+    lengths = 1 + np.bincount(log_place, minlength=num_places)
+    price_offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+    price_steps = np.zeros(price_offsets[-1], dtype=np.int64)
+    price_values = np.empty(price_offsets[-1], dtype=np.float64)
+    price_values[price_offsets[:-1]] = engine.initial_price
+    
+    # Log entries grouped by place, keeping their order within a place
+    order = np.argsort(log_place, kind='stable')
+    grouped = log_place[order]
+    rank = np.arange(len(grouped)) - np.searchsorted(grouped, grouped)
+    position = price_offsets[grouped] + 1 + rank
+    price_steps[position] = log_step[order]
+    price_values[position] = log_price[order]
+    return price_offsets, price_steps, price_values
+
+
+def restore_rng(state):
+    
+    # Generator continuing from a saved bit_generator.state
+    bit_generator = getattr(np.random, state['bit_generator'])()
+    bit_generator.state = state
+    return np.random.Generator(bit_generator)
+
+
+def restore_city(cls, snapshot):
+    
+    meta = json.loads(str(snapshot['meta']))
+    if meta['version'] != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {meta['version']} (expected {SNAPSHOT_VERSION})")
+    
+    area_rates = {int(area): tuple(rates) for area, rates in meta['area_rates'].items()}
+    city = cls(meta['size'], area_rates, engine=meta['engine'], initialize=False)
+    city.area_names = meta.get('area_names')
+    city.step = meta['step']
+    city.same_area_rule = meta['same_area_rule']
+    city.bid_sort_kind = meta['bid_sort_kind']
+    
+    # Continue the exact random stream the snapshot was taken from
+    city.rng = restore_rng(meta['rng_state'])
+    
+    # Array engines take the arrays as they are; objects are created on first access
+    arrays = _engine_state(snapshot) if city.engine != 'object' else None
+    if arrays is not None:
+        city._initialize_arrays(arrays)
+        return city
+    
+    # Places: state is set directly, setup() is not run so nothing is redrawn
+    offsets = np.asarray(snapshot['price_offsets']).tolist()
+    price_steps = np.asarray(snapshot['price_steps'])
+    price_values = np.asarray(snapshot['price_values'])
+    rows = zip(
+        np.asarray(snapshot['place_id']).tolist(),
+        np.asarray(snapshot['place_host_id']).tolist(),
+        np.asarray(snapshot['place_area']).tolist(),
+        np.asarray(snapshot['place_rate']).tolist(),
+        np.asarray(snapshot['place_occupancy']).tolist(),
+    )
+    for i, (place_id, host_id, area, rate, occupancy) in enumerate(rows):
+        start, end = offsets[i], offsets[i + 1]
+        price = PriceHistory.from_arrays(price_steps[start:end].tolist(), price_values[start:end].tolist())
+        place = Place.from_state(place_id, host_id, city, area, rate, price,
+                                 occupancy=None if occupancy < 0 else occupancy)
+        
+        city._places.append(place)
+        city._place_dict[place_id] = place
+    
+    # Hosts: assets follow from place ownership
+    assets = {}
+    for place in city._places:
+        assets.setdefault(place.host_id, []).append(place.place_id)
+    
+    rows = zip(
+        np.asarray(snapshot['host_id']).tolist(),
+        np.asarray(snapshot['host_area']).tolist(),
+        np.asarray(snapshot['host_profits']).tolist(),
+    )
+    for host_id, area, profits in rows:
+        host = Host.from_state(host_id, city, area, profits, assets.get(host_id, []))
+        
+        city._hosts.append(host)
+        city._host_dict[host_id] = host
+    
+    city.start_engine()
+    
+    return city
+
+
+def _engine_state(snapshot):
+    
+    # ArrayEngine arrays of a snapshot, with the price histories as the pending
+    # price log, or None when the histories do not start with the initial price
+    # at step 0 (the layout ArrayEngine.materialize rebuilds)
+    place_id = np.asarray(snapshot['place_id'])
+    offsets = np.asarray(snapshot['price_offsets'])
+    price_steps = np.asarray(snapshot['price_steps'])
+    price_values = np.asarray(snapshot['price_values'])
+    lengths = np.diff(offsets)
+    if (not np.array_equal(place_id, np.arange(len(place_id))) or np.any(lengths == 0)
+            or np.any(price_steps[offsets[:-1]] != 0)):
+        return None
+    
+    # owner indexes host_ids
+    host_ids = np.asarray(snapshot['host_id'])
+    by_id = np.argsort(host_ids, kind='stable')
+    owner = by_id[np.searchsorted(host_ids[by_id], np.asarray(snapshot['place_host_id']))]
+    
+    later = np.ones(len(price_steps), dtype=bool)
+    later[offsets[:-1]] = False
+    log_place = np.repeat(np.arange(len(place_id)), lengths)[later]
+    price_log = list(zip(log_place.tolist(), price_steps[later].tolist(), price_values[later].tolist()))
+    
+    return {
+        'rate': np.asarray(snapshot['place_rate']),
+        'area': np.asarray(snapshot['place_area']),
+        'owner': owner,
+        'host_ids': host_ids,
+        'host_area': np.asarray(snapshot['host_area']),
+        'profits': np.asarray(snapshot['host_profits']),
+        'occupancy': np.maximum(np.asarray(snapshot['place_occupancy']), 0),
+        'ask': np.maximum.reduceat(price_values, offsets[:-1]),
+        'initial_price': price_values[offsets[:-1]],
+        'price_log': price_log,
+    }
+
+
+def save_snapshot(city, path, compressed=False):
+    
+    # Uncompressed is faster to write and read, compressed is smaller on disk
+    if compressed:
+        np.savez_compressed(path, **snapshot_city(city))
+    else:
+        np.savez(path, **snapshot_city(city))
+
+
+def load_snapshot(cls, path):
+    
+    with np.load(path, allow_pickle=False) as data:
+        return restore_city(cls, data)
@@ -0,0 +1,102 @@
+import asyncio
+
+from .analytics import city_profits, city_host_ids
+from .recorder import transaction_records
+
+
+class StepDelta:
+
+    # What changed during one step, small enough to hand to a consumer every
+    # step instead of the city itself:
+    #   transactions - executed transactions as recorder.TRANSACTION_DTYPE rows
+    #   host_ids     - host_id per position of profit_delta (shared between steps
+    #                  while the host set does not change, do not modify)
+    #   profit_delta - change of every host's available profits over the step
+    #                  (earnings plus sales minus purchases)
+    __slots__ = ('step', 'transactions', 'host_ids', 'profit_delta')
+
+    def __init__(self, step, transactions, host_ids, profit_delta):
+        self.step = step
+        self.transactions = transactions
+        self.host_ids = host_ids
+        self.profit_delta = profit_delta
+
+    @property
+    def changed_places(self):
+        # Places that changed owner this step (each place is sold at most once per step)
+        return self.transactions['place_id']
+
+    @property
+    def new_owners(self):
+        # host_id of the new owner of each place in changed_places
+        return self.transactions['buyer_id']
+
+    def __repr__(self):
+        return f"StepDelta(step={self.step}, transactions={len(self.transactions)}, hosts={len(self.host_ids)})"
+
+
+def advance(city):
+
+    # One City.iterate() and the delta it produced
+    before = city_profits(city)
+    transactions = city.iterate()
+    after = city_profits(city)
+    return StepDelta(city.step, transaction_records(city.step, transactions), city_host_ids(city), after - before)
+
+
+def iter_steps(city, num_steps=None):
+
+    # Generator advancing the city one step per item (num_steps=None runs until
+    # the consumer stops). Nothing is computed ahead of the consumer, and
+    # breaking out of the loop (or close()) leaves the city after the last
+    # step that was yielded.
+    step = 0
+    while num_steps is None or step < num_steps:
+        yield advance(city)
+        step += 1
+
+
+async def aiter_steps(city, num_steps=None, buffer=1, executor=None):
+
+    # Async iterator over the same deltas. Steps run in a worker thread
+    # (executor=None -> the loop's default executor) so the event loop stays
+    # responsive; the producer waits while `buffer` deltas are queued, so it
+    # never runs more than buffer + 1 steps ahead of the consumer
+    # (backpressure). Closing the iterator (leave the loop inside
+    # contextlib.aclosing) or cancelling the consuming task stops the producer
+    # once the step in progress has finished, so the city is never left
+    # half-way through a step.
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=buffer)
+    done = object()
+
+    async def produce():
+        step = 0
+        while num_steps is None or step < num_steps:
+            in_flight = loop.run_in_executor(executor, advance, city)
+            try:
+                delta = await asyncio.shield(in_flight)
+            except asyncio.CancelledError:
+                await asyncio.wait([in_flight])
+                raise
+            await queue.put(delta)
+            step += 1
+        await queue.put(done)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.wait([getter, producer], return_when=asyncio.FIRST_COMPLETED)
+            if not getter.done():
+                # The producer failed (or was cancelled) before the next delta
+                getter.cancel()
+                producer.result()
+                return
+            item = getter.result()
+            if item is done:
+                return
+            yield item
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
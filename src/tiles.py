@@ -0,0 +1,203 @@
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .bidding import Opportunities
+from .engine import ArrayEngine
+
+
+# Arrays placed in shared memory: the workers read all of them and write
+# occupancy/earnings for the places of their own tile only
+SHARED_ARRAYS = (
+    'rate', 'area', 'occupancy_low', 'owner', 'ask', 'occupancy', 'draws', 'earnings',
+    'host_area', 'profits', 'selected', 'neighbour_offsets', 'neighbour_ids',
+)
+
+
+def tile_bounds(size, tiles):
+
+    # (row_start, row_stop, col_start, col_stop) of every block of a
+    # tiles = (row_blocks, col_blocks) partition of a size x size grid
+    row_blocks, col_blocks = tiles
+    rows = np.linspace(0, size, min(row_blocks, size) + 1).astype(int)
+    cols = np.linspace(0, size, min(col_blocks, size) + 1).astype(int)
+    return [(int(r0), int(r1), int(c0), int(c1))
+            for r0, r1 in zip(rows[:-1], rows[1:]) for c0, c1 in zip(cols[:-1], cols[1:])]
+
+
+def tile_places(bounds, size):
+
+    # place_ids of a block in ascending order
+    r0, r1, c0, c1 = bounds
+    return (np.arange(r0, r1)[:, None] * size + np.arange(c0, c1)).ravel()
+
+
+# Worker side: shared arrays and per-tile neighbour pairs, set up once per process
+
+class TileState:
+
+    # Same attribute names as ArrayEngine, so bidding policies run unchanged
+    def __init__(self, arrays, size):
+        self.size = size
+        for name, values in arrays.items():
+            setattr(self, name, values)
+
+
+_state = None
+_segments = []
+_pairs = {}
+
+
+def _attach(specs, size):
+
+    global _state
+    arrays = {}
+    for name, (segment_name, shape, dtype) in specs.items():
+        # Workers share the parent's resource tracker, which unlinks the
+        # segments if the parent dies without closing the engine
+        segment = shared_memory.SharedMemory(name=segment_name)
+        _segments.append(segment)
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+    _state = TileState(arrays, size)
+
+
+def _tile_pairs(bounds):
+
+    # (source, target) neighbour pairs whose source lies in the block; the
+    # targets cover the block and a one-cell halo around it
+    if bounds not in _pairs:
+        places = tile_places(bounds, _state.size)
+        offsets = _state.neighbour_offsets
+        starts = offsets[places]
+        degrees = offsets[places + 1] - starts
+        row_start = np.cumsum(degrees) - degrees
+        targets = _state.neighbour_ids[np.arange(degrees.sum()) + np.repeat(starts - row_start, degrees)]
+        _pairs[bounds] = (places, np.repeat(places, degrees), targets)
+    return _pairs[bounds]
+
+
+def _tile_occupancy(bounds):
+
+    # Occupancy and earnings of the block from the draws made by the parent
+    places, _, _ = _tile_pairs(bounds)
+    state = _state
+    state.occupancy[places] = state.occupancy_low[places] + state.draws[places]
+    state.earnings[places] = state.rate[places] * state.occupancy[places]
+
+
+def _tile_bids(bounds, policy, sparse):
+
+    # Bids whose buyer owns a place in the block, deduplicated within the block.
+    # With sparse, only hosts marked in selected bid and the cheapest ask per
+    # buyer is returned for the scheduler.
+    _, sources, targets = _tile_pairs(bounds)
+    state = _state
+    buyers = state.owner[sources]
+    mask = state.owner[targets] != buyers
+    if sparse:
+        mask &= state.selected[buyers]
+    opportunities = Opportunities(state, buyers[mask], targets[mask])
+
+    min_ask = None
+    if sparse:
+        hosts, index = np.unique(opportunities.buyer, return_inverse=True)
+        values = np.full(len(hosts), np.inf)
+        np.minimum.at(values, index, opportunities.ask)
+        min_ask = (hosts, values)
+
+    bids = policy.select(opportunities).unique()
+    bid_price, spread = policy.bid_prices(bids)
+    return bids.buyer, bids.target, spread, bid_price, min_ask
+
+
+def _release(pool, segments):
+
+    pool.shutdown(wait=True, cancel_futures=True)
+    for segment in segments:
+        segment.close()
+        segment.unlink()
+
+
+class TiledEngine(ArrayEngine):
+
+    def __init__(self, city, arrays=None, tiles=None, workers=None):
+
+        # ArrayEngine whose local phases (occupancy, earnings, bid generation)
+        # run per grid block in worker processes over shared memory. Only the
+        # global steps stay in the parent: the random draw, summing earnings
+        # per host, and matching/executing the bids of all blocks.
+        super().__init__(city, arrays)
+
+        # One worker per CPU at most, and never more workers than blocks
+        workers = workers or os.cpu_count()
+        self.tiles = tile_bounds(city.size, tiles or (workers, 1))
+        workers = min(workers, len(self.tiles))
+
+        num_places = len(self.rate)
+        self.draws = np.zeros(num_places, dtype=np.int64)
+        self.earnings = np.zeros(num_places, dtype=np.float64)
+        self.selected = np.zeros(len(self.profits), dtype=bool)
+
+        # Move every array into shared memory; the engine keeps working on views
+        segments = []
+        specs = {}
+        for name in SHARED_ARRAYS:
+            values = np.ascontiguousarray(getattr(self, name))
+            segment = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+            shared = np.ndarray(values.shape, dtype=values.dtype, buffer=segment.buf)
+            shared[...] = values
+            setattr(self, name, shared)
+            segments.append(segment)
+            specs[name] = (segment.name, values.shape, values.dtype.str)
+
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(specs, city.size))
+        self._finalizer = weakref.finalize(self, _release, self.pool, segments)
+
+    def close(self):
+
+        # Stop the workers and free the shared memory
+        self._finalizer()
+
+    def update_occupancy(self):
+
+        # Same single batched draw as ArrayEngine, so a seed gives the same run
+        self.draws[:] = self.city.rng.integers(0, 11, size=len(self.rate))
+        list(self.pool.map(_tile_occupancy, self.tiles))
+
+    def update_profits(self):
+
+        # Earnings were computed per block; summing them per host in place order
+        # keeps the result identical to ArrayEngine
+        self.profits += np.bincount(self.owner, weights=self.earnings, minlength=len(self.profits))
+
+    def collect_bids(self, policy, active=None):
+
+        sparse = active is not None
+        if sparse:
+            self.selected[:] = False
+            self.selected[active] = True
+
+        results = list(self.pool.map(_tile_bids, self.tiles, [policy] * len(self.tiles),
+                                     [sparse] * len(self.tiles)))
+
+        # Reconciliation: a buyer owning places in several blocks (or next to a
+        # block edge) can reach the same place from more than one block. Such
+        # rows are identical, so one of each is kept; sorting by (buyer, place)
+        # reproduces the order ArrayEngine.make_bids returns, and with it the
+        # tie-breaking of match_bids.
+        buyers, targets, spread, bid_price = (np.concatenate([result[i] for result in results])
+                                              for i in range(4))
+        keys = buyers * len(self.rate) + targets
+        _, first = np.unique(keys, return_index=True)
+        bids = (buyers[first], targets[first], spread[first], bid_price[first])
+
+        min_ask = None
+        if sparse:
+            min_ask = np.full(len(self.profits), np.inf)
+            for hosts, values in (result[4] for result in results):
+                np.minimum.at(min_ask, hosts, values)
+
+        return bids, min_ask
@@ -0,0 +1,258 @@
+import argparse
+import glob
+import hashlib
+import inspect
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from main import run_simulation
+from src.analytics import area_wealth, concentration, city_wealth
+
+
+METRICS = ['gini', 'top_decile_share'] + [f'mean_wealth_area_{area}' for area in range(4)]
+
+# Finished runs of explore() are cached here, one JSON file per run
+DEFAULT_CACHE_DIR = os.path.join('data', 'sweeps')
+
+# Per-run bookkeeping columns that are neither parameters nor metrics
+RUN_COLUMNS = ['seed', 'seconds']
+
+
+def summarize_city(city):
+    """Summary metrics of the end-state wealth distribution of a City"""
+    metrics = concentration(city_wealth(city))
+    by_area = area_wealth(city)
+    area_means = dict(zip(by_area['area'].tolist(), by_area['mean'].tolist()))
+
+    summary = {
+        'gini': metrics['gini'],
+        'top_decile_share': metrics['top_10pct_share'],
+    }
+    for area in sorted(set(range(4)) | set(city.area_rates)):
+        summary[f'mean_wealth_area_{area}'] = area_means.get(area, np.nan)
+
+    return summary
+
+
+def run_task(task):
+    """
+    Worker entry point: one run_simulation call for one (seed, version, params).
+    Every City draws from its own Generator seeded by run_simulation, so runs
+    never share random state even when a worker process is reused.
+    """
+    start = time.perf_counter()
+    city = run_simulation(task['area_rates'], bidding_version=task['bidding_version'],
+                          seed=task['seed'], **task['params'])
+    result = {'seed': task['seed'], 'bidding_version': task['bidding_version'], 'area_rates': task['label']}
+    result.update(task['params'])
+    result.update(summarize_city(city))
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def run_tasks(tasks, workers=None):
+    """Run tasks across a process pool, yielding (task, result) as each one finishes"""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_task, task): task for task in tasks}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def rates_label(area_rates):
+    """Canonical JSON string of an area_rates dict (used in cache keys and tables)"""
+    return json.dumps({str(area): list(area_rates[area]) for area in sorted(area_rates)})
+
+
+def code_version():
+    """Digest of the simulation sources; cached runs are only reused while it is unchanged"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    sources = sorted(glob.glob(os.path.join(root, 'src', '*.py')))
+    for path in sources + [os.path.join(root, 'main.py'), os.path.abspath(__file__)]:
+        with open(path, 'rb') as f:
+            digest.update(os.path.basename(path).encode())
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def simulation_defaults():
+    """Defaults of the run_simulation arguments a grid can vary (size, num_steps, engine)"""
+    fixed = {'area_rates', 'bidding_version', 'seed'}
+    return {
+        name: parameter.default
+        for name, parameter in inspect.signature(run_simulation).parameters.items()
+        if name not in fixed and isinstance(parameter.default, (int, float, str))
+    }
+
+
+def build_tasks(param_grid, seeds):
+    """
+    Cartesian product of seeds x param_grid, without duplicates, keyed by a
+    canonical JSON string of each run. param_grid maps 'area_rates' to a list of
+    area_rates dicts, 'bidding_version' to versions and any other run_simulation
+    keyword argument (size, num_steps, engine...) to a list of values. Parameters
+    left out take their run_simulation default, so size=10 given explicitly and
+    size left out are the same run.
+    """
+    param_grid = dict(param_grid)
+    rate_grid = param_grid.pop('area_rates')
+    versions = param_grid.pop('bidding_version', ['v0', 'v02'])
+    names = sorted(param_grid)
+    defaults = simulation_defaults()
+
+    tasks = {}
+    for area_rates, version, values in itertools.product(
+        rate_grid, versions, itertools.product(*(param_grid[name] for name in names))
+    ):
+        params = dict(defaults, **dict(zip(names, values)))
+        label = rates_label(area_rates)
+        for seed in seeds:
+            key = json.dumps({'area_rates': label, 'bidding_version': version, 'seed': seed, **params},
+                             sort_keys=True)
+            tasks.setdefault(key, {'area_rates': area_rates, 'label': label, 'seed': seed,
+                                   'bidding_version': version, 'params': params})
+    return tasks
+
+
+def estimated_cost(task):
+    """Relative run time of a task: place-steps (grid cells x steps)"""
+    params = task['params']
+    return params['size'] ** 2 * params['num_steps']
+
+
+def explore(param_grid, seeds, cache_dir=DEFAULT_CACHE_DIR, workers=None):
+    """
+    Parameter-space exploration. Every finished run is written to cache_dir
+    under a hash of its parameters, seed and code_version(), so repeated or
+    interrupted sweeps only run what is missing (cache_dir=None runs everything
+    without caching). Remaining runs are submitted longest first so the slowest
+    ones do not end up alone at the tail.
+    Yields (result, cached) for every run, cached ones first.
+    """
+    tasks = build_tasks(param_grid, seeds)
+    pending = list(tasks.values())
+
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        version = code_version()
+        pending = []
+        for key, task in tasks.items():
+            digest = hashlib.sha256(f'{version}:{key}'.encode()).hexdigest()[:24]
+            task['cache_path'] = os.path.join(cache_dir, f'{digest}.json')
+            if os.path.exists(task['cache_path']):
+                with open(task['cache_path']) as f:
+                    yield json.load(f), True
+            else:
+                pending.append(task)
+
+    pending.sort(key=estimated_cost, reverse=True)
+    for task, result in run_tasks(pending, workers):
+        if cache_dir is not None:
+            # Written to a temporary file first so an interrupted write is never mistaken for a result
+            tmp = task['cache_path'] + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(result, f)
+            os.replace(tmp, task['cache_path'])
+        yield result, False
+
+
+def results_table(results):
+    """Tidy table of explore() results: one row per run, parameters, seed, metrics, run time"""
+    df = pd.DataFrame(results)
+    metrics = metric_columns(df)
+    params = [col for col in df.columns if col not in metrics and col not in RUN_COLUMNS]
+    return df[params + ['seed'] + metrics + ['seconds']].sort_values(params + ['seed'], ignore_index=True)
+
+
+def metric_columns(df):
+    """Metric columns present in a results frame"""
+    return [col for col in df.columns if col in METRICS or col.startswith('mean_wealth_area_')]
+
+
+def aggregate(results, z=1.96):
+    """
+    Mean, standard deviation and normal-approximation confidence interval
+    (z=1.96 -> 95%) of every metric per bidding version and parameter set.
+    """
+    df = pd.DataFrame(results)
+    metrics = metric_columns(df)
+    group_cols = [col for col in df.columns if col not in metrics and col not in RUN_COLUMNS]
+
+    rows = []
+    for key, group in df.groupby(group_cols, sort=True):
+        key = key if isinstance(key, tuple) else (key,)
+        row = dict(zip(group_cols, key))
+        row['runs'] = len(group)
+        for metric in metrics:
+            values = group[metric].dropna()
+            mean = values.mean()
+            std = values.std(ddof=1) if len(values) > 1 else 0.0
+            half_width = z * std / np.sqrt(len(values)) if len(values) else np.nan
+            row[f'{metric}_mean'] = mean
+            row[f'{metric}_ci_low'] = mean - half_width
+            row[f'{metric}_ci_high'] = mean + half_width
+        rows.append(row)
+
+    return pd.DataFrame(rows)
+
+
+def load_area_rates(path):
+    """JSON list of area_rates configurations, e.g. [{"0": [100, 200], "1": [50, 250]}]"""
+    with open(path) as f:
+        configs = json.load(f)
+    return [{int(area): tuple(bounds) for area, bounds in config.items()} for config in configs]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo seed sweep of v0 vs v02 bidding")
+    parser.add_argument('--seeds', type=int, default=20, help="number of seeds per configuration")
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--steps', type=int, nargs='+', default=[180], help="num_steps values")
+    parser.add_argument('--size', type=int, nargs='+', default=[10], help="grid size values")
+    parser.add_argument('--area-rates', default=None,
+                        help="JSON file with a list of area_rates configurations to explore")
+    parser.add_argument('--versions', nargs='+', default=['v0', 'v02'], help="bidding versions")
+    parser.add_argument('--engine', nargs='+', default=['object'], choices=['object', 'array'])
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="directory of cached runs")
+    parser.add_argument('--no-cache', action='store_true', help="run every task without the cache")
+    parser.add_argument('--output', default=None, help="optional CSV path for per-run results")
+    args = parser.parse_args()
+
+    area_rates = {
+        0: (100, 200),
+        1: (50, 250),
+        2: (250, 350),
+        3: (150, 450)
+    }
+    seeds = range(args.first_seed, args.first_seed + args.seeds)
+
+    rate_grid = load_area_rates(args.area_rates) if args.area_rates else [area_rates]
+    grid = {'area_rates': rate_grid, 'bidding_version': args.versions,
+            'num_steps': args.steps, 'size': args.size, 'engine': args.engine}
+    total = len(build_tasks(grid, seeds))
+    runs = explore(grid, seeds, cache_dir=None if args.no_cache else args.cache_dir, workers=args.workers)
+
+    results = []
+    for result, cached in runs:
+        results.append(result)
+        source = 'cached' if cached else f"{result['seconds']:.1f}s"
+        print(f"[{len(results)}/{total}] seed={result['seed']} {result['bidding_version']}: "
+              f"gini={result['gini']:.3f} top10%={result['top_decile_share']:.3f} ({source})")
+
+    if args.output:
+        results_table(results).to_csv(args.output, index=False)
+
+    summary = aggregate(results)
+    with pd.option_context('display.max_columns', None, 'display.width', 200):
+        print(summary)
+
+
+if __name__ == "__main__":
+    main()
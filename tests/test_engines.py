@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from src.bidding import DEFAULT_POLICY, max_distance, max_portfolio
+from src.city import City
+from src.scheduler import ActiveSet
+
+
+AREA_RATES = {
+    0: (100, 200),
+    1: (50, 250),
+    2: (250, 350),
+    3: (150, 450)
+}
+
+
+def run_transactions(engine, seed, bidding_version, steps=60, size=12, **options):
+    """Transactions of every step of one run, as (step, place, seller, buyer, price) rows"""
+    with City(size, AREA_RATES, engine=engine, rng=seed, tiles=options.get('tiles')) as city:
+        city.same_area_rule = bidding_version == 'v02'
+        city.bidding_policy = options.get('policy')
+        if options.get('scheduler'):
+            city.scheduler = ActiveSet()
+        return [
+            (step, t['place_id'], t['seller_id'], t['buyer_id'], t['bid_price'])
+            for step in range(1, steps + 1) for t in city.iterate()
+        ]
+
+
+def assert_same_transactions(expected, actual):
+    assert [row[:4] for row in actual] == [row[:4] for row in expected]
+    np.testing.assert_allclose([row[4] for row in actual], [row[4] for row in expected], rtol=1e-12)
+
+
+@pytest.mark.parametrize('bidding_version', ['v0', 'v02'])
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_array_engines_match_object_engine(seed, bidding_version):
+    expected = run_transactions('object', seed, bidding_version)
+    assert expected
+    assert_same_transactions(expected, run_transactions('array', seed, bidding_version))
+    assert_same_transactions(expected, run_transactions('tiled', seed, bidding_version, tiles=(2, 2)))
+
+
+@pytest.mark.parametrize('options', [
+    {'scheduler': True},
+    {'policy': DEFAULT_POLICY.with_filters(max_distance(2), max_portfolio(6))},
+])
+def test_tiled_engine_matches_object_engine_with_options(options):
+    expected = run_transactions('object', 7, 'v0', **options)
+    assert_same_transactions(expected, run_transactions('tiled', 7, 'v0', tiles=(3, 2), **options))
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from src.analytics import city_wealth
+from src.city import City
+from src.eventlog import EventLog, TransactionLog, city_state
+
+
+AREA_RATES = {
+    0: (100, 200),
+    1: (50, 250),
+    2: (250, 350),
+    3: (150, 450)
+}
+
+
+def logged_run(directory, engine, steps, checkpoint_every):
+    """Run a logged city, returning the city and its real state and wealth after every step"""
+    city = City(10, AREA_RATES, engine=engine, rng=3)
+    city.event_log = TransactionLog(directory, city, checkpoint_every=checkpoint_every)
+    states = {0: city_state(city)}
+    wealth = {0: city_wealth(city)}
+    for _ in range(steps):
+        city.iterate()
+        states[city.step] = city_state(city)
+        wealth[city.step] = city_wealth(city)
+    return city, states, wealth
+
+
+def test_live_log_without_checkpoint_after_last_step(tmp_path):
+    city, states, _ = logged_run(str(tmp_path), 'array', 37, checkpoint_every=50)
+    city.event_log.flush()
+
+    log = EventLog(str(tmp_path))
+    last_buyer = int(log.events['buyer_id'][-1])
+    steps, sizes = log.portfolio_sizes(last_buyer)
+
+    assert steps[-1] == log.last_step < city.step
+    expected = [np.count_nonzero(states[step]['owner_id'] == last_buyer) for step in steps.tolist()]
+    assert sizes.tolist() == expected
+
+
+@pytest.mark.parametrize('engine', ['object', 'array'])
+def test_replay_matches_city_state(tmp_path, engine):
+    city, states, wealth = logged_run(str(tmp_path), engine, 70, checkpoint_every=20)
+    city.event_log.close()
+    log = EventLog(str(tmp_path))
+    assert log.last_step == 70
+
+    # Checkpoints, steps right after them and steps in between
+    for step in [0, 1, 13, 20, 21, 39, 40, 58, 70]:
+        expected = states[step]
+        state = log.state_at(step)
+        np.testing.assert_array_equal(state['owner_id'], expected['owner_id'])
+        np.testing.assert_array_equal(log.owners_at(step), expected['owner_id'])
+        np.testing.assert_allclose(state['ask'], expected['ask'], rtol=1e-12, atol=1e-6)
+        np.testing.assert_allclose(state['profits'], expected['profits'], rtol=1e-12, atol=1e-6)
+        np.testing.assert_allclose(log.wealth_at(step), wealth[step], rtol=1e-12, atol=1e-6)
+
+    for place_id in range(0, 100, 7):
+        for step in [5, 33, 70]:
+            assert log.owner_at(place_id, step) == states[step]['owner_id'][place_id]
@@ -0,0 +1,35 @@
+import pytest
+
+from src.bidding import DEFAULT_POLICY, SAME_AREA_POLICY, max_distance, max_portfolio
+from src.city import City
+from src.scheduler import ActiveSet
+
+
+AREA_RATES = {
+    0: (100, 200),
+    1: (50, 250),
+    2: (250, 350),
+    3: (150, 450)
+}
+
+POLICIES = {
+    'v0': DEFAULT_POLICY,
+    'v02': SAME_AREA_POLICY,
+    'custom': DEFAULT_POLICY.with_filters(max_distance(2), max_portfolio(6)),
+}
+
+
+def run_transactions(engine, policy, scheduler, seed, steps=80, size=12):
+    city = City(size, AREA_RATES, engine=engine, rng=seed)
+    city.bidding_policy = policy
+    city.scheduler = scheduler
+    return [city.iterate() for _ in range(steps)]
+
+
+@pytest.mark.parametrize('policy', list(POLICIES))
+@pytest.mark.parametrize('engine', ['object', 'array'])
+@pytest.mark.parametrize('seed', [0, 1])
+def test_scheduler_does_not_change_transactions(engine, policy, seed):
+    expected = run_transactions(engine, POLICIES[policy], None, seed)
+    assert any(expected)
+    assert run_transactions(engine, POLICIES[policy], ActiveSet(), seed) == expected
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from src.city import City
+
+
+AREA_RATES = {
+    0: (100, 200),
+    1: (50, 250),
+    2: (250, 350),
+    3: (150, 450)
+}
+
+
+def make_city(engine, bulk):
+    if bulk:
+        return City.build(12, AREA_RATES, engine=engine, rng=5)
+    return City(12, AREA_RATES, engine=engine, rng=5)
+
+
+def transaction_rows(city, steps):
+    """(step, place, seller, buyer, price) rows of the next steps of a city"""
+    return [
+        (city.step, t['place_id'], t['seller_id'], t['buyer_id'], t['bid_price'])
+        for _ in range(steps) for t in city.iterate()
+    ]
+
+
+def assert_same_transactions(expected, actual):
+    assert expected
+    assert [row[:4] for row in actual] == [row[:4] for row in expected]
+    np.testing.assert_allclose([row[4] for row in actual], [row[4] for row in expected], rtol=1e-12)
+
+
+@pytest.mark.parametrize('engine, bulk', [
+    ('object', False), ('array', False), ('array', True), ('tiled', False), ('tiled', True),
+])
+def test_branches_continue_like_the_original(tmp_path, engine, bulk):
+    path = str(tmp_path / 'city.npz')
+    with make_city(engine, bulk) as city:
+        for _ in range(30):
+            city.iterate()
+        city.save(path)
+
+        with city.fork() as branch, City.load(path) as loaded:
+            assert branch.engine == loaded.engine == engine
+            assert [sorted(host.assets) for host in branch.hosts] == [sorted(host.assets) for host in city.hosts]
+            assert [place.price.items() for place in loaded.places] == [place.price.items() for place in city.places]
+
+            expected = transaction_rows(city, 30)
+            assert_same_transactions(expected, transaction_rows(branch, 30))
+            assert_same_transactions(expected, transaction_rows(loaded, 30))